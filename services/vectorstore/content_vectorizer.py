@@ -7,14 +7,102 @@ import asyncio
 import hashlib
 import httpx
 import json
+import os
 import re
+import sqlite3
 import time
+import xxhash
 import numpy as np
+from collections import OrderedDict
 from datetime import datetime
 from typing import Dict, Any, List, Optional, Tuple
 import chromadb
 from chromadb.config import Settings
 
+try:
+    import numba
+except ImportError:
+    numba = None
+
+_WS_RE = re.compile(r'\s+')
+_SENT_RE = re.compile(r'(?<=[.!?])\s+')
+
+
+def _fixed_spans_py(buf, chunk_size, overlap):
+    """Byte-offset spans for fixed-size chunking; mirrors the JIT version"""
+    n = buf.shape[0]
+    spans = np.empty((n // max(chunk_size - overlap, 1) + 2, 2), dtype=np.int64)
+    count = 0
+    start = 0
+    while start < n:
+        end = start + chunk_size
+        if end < n and buf[end] != 32 and buf[end] != 9 and buf[end] != 10 and buf[end] != 13:
+            last_space = end - 1
+            while last_space > start and buf[last_space] != 32:
+                last_space -= 1
+            if last_space - start > chunk_size * 0.7:
+                end = last_space
+        if end > n:
+            end = n
+        spans[count, 0] = start
+        spans[count, 1] = end
+        count += 1
+        step = start + chunk_size - overlap
+        start = step if step > end else end
+    return spans[:count]
+
+
+if numba is not None:
+    _fixed_spans = numba.njit(cache=True)(_fixed_spans_py)
+else:
+    _fixed_spans = _fixed_spans_py
+
+
+def _mmr(embeddings, sims, top_k: int, lam: float = 0.7):
+    """Maximal-marginal-relevance selection over normalized embeddings
+
+    Promotes diverse chunks instead of near-duplicates. Vectors are
+    stored pre-normalized, so the pairwise similarity matrix is one
+    matmul and each round is pure NumPy masking — no per-candidate
+    Python arithmetic and no extra Ollama calls.
+    """
+    top_k = min(top_k, len(sims))
+    pairwise = embeddings @ embeddings.T
+    selected = [int(np.argmax(sims))]
+    while len(selected) < top_k:
+        penalty = pairwise[:, selected].max(axis=1)
+        scores = lam * sims - (1 - lam) * penalty
+        scores[selected] = -np.inf
+        selected.append(int(scores.argmax()))
+    return selected
+
+
+def _score(distances, similarity_threshold: float):
+    """Convert cosine distances to similarities and pick passing indices
+
+    Module-level so rag_search can run it via asyncio.to_thread; NumPy
+    releases the GIL, keeping the event loop free under concurrent load.
+    """
+    similarities = np.maximum(0, 1 - np.asarray(distances, dtype=np.float32))
+    kept = np.where(similarities >= similarity_threshold)[0]
+    return similarities, kept
+
+
+def _cosine_score(embeddings, query_embedding, similarity_threshold: float):
+    """Score candidates by cosine against the query embedding directly
+
+    Fallback for collections whose HNSW space is not cosine (e.g. ones
+    created by older deployments with the l2 default), where 1 - distance
+    is meaningless. Stored vectors may be unnormalized, so divide by
+    their norms explicitly.
+    """
+    embs = np.asarray(embeddings, dtype=np.float32)
+    query = np.asarray(query_embedding, dtype=np.float32)
+    norms = np.linalg.norm(embs, axis=1) + 1e-8
+    similarities = np.maximum(0, embs @ query / norms)
+    kept = np.where(similarities >= similarity_threshold)[0]
+    return similarities, kept
+
 
 class ContentResult:
     """Container for extracted web content"""
@@ -23,7 +111,19 @@ class ContentResult:
         self.title = title
         self.text = text
         self.timestamp = timestamp or time.time()
-        self.content_hash = hashlib.sha256(text.encode()).hexdigest()[:16]
+        self.content_hash: Optional[str] = None
+
+    def _hash_bytes(self) -> str:
+        hasher = hashlib.blake2b(digest_size=8)
+        hasher.update(self.text.encode('utf-8', 'ignore'))
+        return hasher.hexdigest()
+
+    async def compute_hash(self) -> str:
+        """Hash the text off the event loop; multi-MB pages would
+        otherwise block every other coroutine while hashing"""
+        if self.content_hash is None:
+            self.content_hash = await asyncio.to_thread(self._hash_bytes)
+        return self.content_hash
 
 
 class RAGResult:
@@ -43,12 +143,17 @@ class ContentVectorizer:
     def __init__(self, ollama_base_url: str = None, 
                  embedding_model: str = "nomic-embed-text:latest",
                  chroma_path: str = "./chroma_db"):
-        import os
         if ollama_base_url is None:
             ollama_base_url = os.getenv("OLLAMA_URL", "http://localhost:11434")
         self.ollama_base_url = ollama_base_url
         self.embedding_model = embedding_model
         self.chroma_path = chroma_path
+        self._client: Optional[httpx.AsyncClient] = None
+
+        # LRU cache of embeddings so repeated queries skip the round-trip
+        self._emb_cache: "OrderedDict[tuple, List[float]]" = OrderedDict()
+        self._emb_cache_size = 1024
+        self._emb_cache_lock = asyncio.Lock()
         
         # Initialize ChromaDB
         self.chroma_client = chromadb.PersistentClient(
@@ -56,40 +161,203 @@ class ContentVectorizer:
             settings=Settings(anonymized_telemetry=False)
         )
         
-        # Create or get collection
+        # Create or get collection. HNSW parameters are explicit (and
+        # operator-tunable) rather than Chroma defaults: M trades memory
+        # for graph connectivity, construction_ef buys recall at build
+        # time, search_ef buys recall at query time.
         self.collection = self.chroma_client.get_or_create_collection(
             name="web_content",
-            metadata={"description": "WebRAG content embeddings"}
+            metadata={
+                "description": "WebRAG content embeddings",
+                "hnsw:space": "cosine",
+                "hnsw:M": int(os.getenv("HNSW_M", "16")),
+                "hnsw:construction_ef": int(os.getenv("HNSW_CONSTRUCTION_EF", "200")),
+                "hnsw:search_ef": int(os.getenv("HNSW_SEARCH_EF", "100")),
+                "hnsw:batch_size": int(os.getenv("HNSW_BATCH_SIZE", "1000")),
+                "hnsw:sync_threshold": int(os.getenv("HNSW_SYNC_THRESHOLD", "2000"))
+            }
+        )
+
+        # get_or_create_collection cannot change the space of an existing
+        # collection: one created by an older deployment keeps the l2
+        # default regardless of the metadata above. Record the actual
+        # space so scoring falls back to embedding-based cosine instead
+        # of silently treating 1 - L2^2 as a similarity.
+        collection_meta = self.collection.metadata or {}
+        self._cosine_space = collection_meta.get("hnsw:space") == "cosine"
+
+        # Local dedupe filter so duplicate documents never hit a Chroma
+        # metadata scan: in-memory set backed by a small sqlite file.
+        # check_same_thread=False because clients may construct the
+        # vectorizer via asyncio.to_thread while later writes happen on
+        # the event-loop thread; access is serialized on the loop.
+        self._hash_db = sqlite3.connect(
+            f"{chroma_path}/hashes.sqlite", check_same_thread=False
+        )
+        self._hash_db.execute("CREATE TABLE IF NOT EXISTS hashes(h TEXT PRIMARY KEY)")
+        self._hash_set = {row[0] for row in self._hash_db.execute("SELECT h FROM hashes")}
+
+        # Source counters for get_knowledge_stats, kept current on every
+        # add so stats never need a full metadata scan
+        self._urls: set = set()
+        self._titles: set = set()
+
+        seed_hashes = not self._hash_set
+        stored = self.collection.get(include=["metadatas"])
+        for metadata in stored.get("metadatas") or []:
+            if metadata.get("url"):
+                self._urls.add(metadata["url"])
+            if metadata.get("title"):
+                self._titles.add(metadata["title"])
+            if seed_hashes and metadata.get("content_hash"):
+                self._hash_set.add(metadata["content_hash"])
+        if seed_hashes and self._hash_set:
+            self._hash_db.executemany(
+                "INSERT OR IGNORE INTO hashes VALUES (?)",
+                [(h,) for h in self._hash_set]
+            )
+            self._hash_db.commit()
+
+        # Write buffer so many small pages flush to Chroma as one
+        # batched add instead of one HNSW insert per document
+        self._buf = {"ids": [], "docs": [], "embs": [], "metas": []}
+        self._buf_lock = asyncio.Lock()
+        self._flush_threshold = 2048
+
+    async def flush(self):
+        """Flush buffered chunks to ChromaDB; call at shutdown"""
+        async with self._buf_lock:
+            await asyncio.to_thread(self._flush_locked)
+
+    def _flush_locked(self):
+        """Write the buffer out in one collection.add; caller holds the lock"""
+        if not self._buf["ids"]:
+            return
+        self.collection.add(
+            ids=self._buf["ids"],
+            documents=self._buf["docs"],
+            embeddings=self._buf["embs"],
+            metadatas=self._buf["metas"]
         )
+        self._buf = {"ids": [], "docs": [], "embs": [], "metas": []}
+
+    def _remember_hash(self, content_hash: str):
+        """Record a stored content hash in the dedupe filter"""
+        self._hash_set.add(content_hash)
+        self._hash_db.execute("INSERT OR IGNORE INTO hashes VALUES (?)", (content_hash,))
+        self._hash_db.commit()
     
+    def _get_client(self) -> httpx.AsyncClient:
+        """Lazily create the shared Ollama client with connection pooling"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.ollama_base_url,
+                timeout=30.0,
+                limits=httpx.Limits(
+                    max_keepalive_connections=40,
+                    max_connections=100,
+                    keepalive_expiry=30
+                )
+            )
+        return self._client
+
+    async def aclose(self):
+        """Close the shared HTTP client"""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+
     async def get_ollama_embedding(self, text: str, task_prefix: str = "search_document") -> List[float]:
         """Get embeddings from Ollama using nomic-embed-text"""
         # Add task prefix as required by nomic-embed-text
         prefixed_text = f"{task_prefix}: {text}"
-        
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            try:
-                response = await client.post(
-                    f"{self.ollama_base_url}/api/embeddings",
-                    json={
-                        "model": self.embedding_model,
-                        "prompt": prefixed_text
-                    }
-                )
-                response.raise_for_status()
-                result = response.json()
-                return result["embedding"]
-            except Exception as e:
-                print(f" Embedding failed for text: {text[:100]}... Error: {e}")
-                raise
-    
+
+        cache_key = (
+            self.embedding_model,
+            task_prefix,
+            hashlib.blake2b(text.encode('utf-8', 'ignore'), digest_size=16).digest()
+        )
+        async with self._emb_cache_lock:
+            if cache_key in self._emb_cache:
+                self._emb_cache.move_to_end(cache_key)
+                return self._emb_cache[cache_key]
+
+        client = self._get_client()
+        try:
+            response = await client.post(
+                "/api/embeddings",
+                json={
+                    "model": self.embedding_model,
+                    "prompt": prefixed_text
+                }
+            )
+            response.raise_for_status()
+            result = response.json()
+            embedding = result["embedding"]
+            async with self._emb_cache_lock:
+                self._emb_cache[cache_key] = embedding
+                if len(self._emb_cache) > self._emb_cache_size:
+                    self._emb_cache.popitem(last=False)
+            return embedding
+        except Exception as e:
+            print(f" Embedding failed for text: {text[:100]}... Error: {e}")
+            raise
+
+    async def get_ollama_embeddings_batch(self, texts: List[str],
+                                          task_prefix: str = "search_document"
+                                          ) -> List[Optional[List[float]]]:
+        """Get embeddings for multiple texts in a single Ollama request
+
+        The result is always aligned with the input: a text whose
+        embedding failed yields None at its position, never a compacted
+        list, so callers can pair texts and embeddings by index.
+        """
+        # Add task prefix as required by nomic-embed-text
+        prefixed_texts = [f"{task_prefix}: {text}" for text in texts]
+
+        client = self._get_client()
+        try:
+            response = await client.post(
+                "/api/embed",
+                json={
+                    "model": self.embedding_model,
+                    "input": prefixed_texts
+                },
+                timeout=120.0
+            )
+            response.raise_for_status()
+            result = response.json()
+            embeddings = result.get("embeddings")
+            if embeddings and len(embeddings) == len(texts):
+                return embeddings
+        except Exception as e:
+            print(f" Batch embedding failed, falling back to per-text requests: {e}")
+
+        # Fallback for older Ollama versions without /api/embed. Bound the
+        # concurrency to match Ollama's OLLAMA_NUM_PARALLEL request slots.
+        semaphore = asyncio.Semaphore(int(os.getenv("EMBED_CONCURRENCY", "8")))
+
+        async def _embed_one(index: int, text: str):
+            async with semaphore:
+                return index, await self.get_ollama_embedding(text, task_prefix)
+
+        results = await asyncio.gather(
+            *[_embed_one(i, text) for i, text in enumerate(texts)],
+            return_exceptions=True
+        )
+        embeddings: List[Optional[List[float]]] = [None] * len(texts)
+        for result in results:
+            if not isinstance(result, BaseException):
+                index, embedding = result
+                embeddings[index] = embedding
+        return embeddings
+
     def smart_chunk(self, text: str, max_chunk_size: int = 512, overlap: int = 50) -> List[str]:
         """Intelligent text chunking with semantic boundaries"""
         if not text or len(text.strip()) == 0:
             return []
         
         # Clean and normalize text
-        text = re.sub(r'\s+', ' ', text.strip())
+        text = _WS_RE.sub(' ', text.strip())
         
         # If text is small enough, return as single chunk
         if len(text) <= max_chunk_size:
@@ -99,47 +367,48 @@ class ContentVectorizer:
         
         # Method 1: Sentence-based chunking (preferred)
         try:
-            # Simple sentence splitting using multiple delimiters
-            sentences = re.split(r'(?<=[.!?])\s+', text)
-            current_chunk = ""
-            
+            # Simple sentence splitting using multiple delimiters.
+            # Track chunk pieces and a running length so each append is
+            # O(1) instead of re-copying the chunk prefix per sentence.
+            sentences = _SENT_RE.split(text)
+            cur_parts, cur_len = [], 0
+
             for sentence in sentences:
                 sentence = sentence.strip()
                 if not sentence:
                     continue
-                
+
                 # Check if adding this sentence would exceed limit
-                test_chunk = current_chunk + (" " if current_chunk else "") + sentence
-                
-                if len(test_chunk) <= max_chunk_size:
-                    current_chunk = test_chunk
+                new_len = cur_len + (1 if cur_parts else 0) + len(sentence)
+
+                if new_len <= max_chunk_size:
+                    cur_parts.append(sentence)
+                    cur_len = new_len
                 else:
                     # Save current chunk if it has content
-                    if current_chunk:
-                        chunks.append(current_chunk)
-                    
+                    if cur_parts:
+                        chunks.append(' '.join(cur_parts))
+                    cur_parts, cur_len = [], 0
+
                     # Handle sentences longer than max_chunk_size
                     if len(sentence) > max_chunk_size:
                         # Split long sentence by words
-                        words = sentence.split()
-                        temp_chunk = ""
-                        for word in words:
-                            test_temp = temp_chunk + (" " if temp_chunk else "") + word
-                            if len(test_temp) <= max_chunk_size:
-                                temp_chunk = test_temp
+                        for word in sentence.split():
+                            new_len = cur_len + (1 if cur_parts else 0) + len(word)
+                            if new_len <= max_chunk_size:
+                                cur_parts.append(word)
+                                cur_len = new_len
                             else:
-                                if temp_chunk:
-                                    chunks.append(temp_chunk)
-                                temp_chunk = word
-                        if temp_chunk:
-                            current_chunk = temp_chunk
+                                if cur_parts:
+                                    chunks.append(' '.join(cur_parts))
+                                cur_parts, cur_len = [word], len(word)
                     else:
-                        current_chunk = sentence
-            
+                        cur_parts, cur_len = [sentence], len(sentence)
+
             # Add the last chunk
-            if current_chunk:
-                chunks.append(current_chunk)
-        
+            if cur_parts:
+                chunks.append(' '.join(cur_parts))
+
         except Exception:
             # Fallback: Fixed-size overlapping windows
             chunks = self._fixed_size_chunk(text, max_chunk_size, overlap)
@@ -149,97 +418,192 @@ class ContentVectorizer:
         
         return chunks
     
-    def _fixed_size_chunk(self, text: str, chunk_size: int, overlap: int) -> List[str]:
-        """Fallback: Fixed-size chunking with overlap"""
+    def _cdc_chunk(self, text: str, avg: int = 512, min_size: int = 128,
+                   max_size: int = 1024) -> List[str]:
+        """Content-defined chunking with hash-derived boundaries
+
+        Sentence-greedy chunking shifts every boundary after an edit, so
+        the same article crawled from two URLs embeds as disjoint chunk
+        sets. Cutting where a rolling hash of the trailing bytes hits
+        0 mod M keeps boundaries anchored to the content itself, so
+        shared passages produce identical chunks and dedupe catches them.
+        """
+        if not text or len(text.strip()) == 0:
+            return []
+
+        text = _WS_RE.sub(' ', text.strip())
+        if len(text) <= max_size:
+            return [text]
+
         chunks = []
-        start = 0
-        
-        while start < len(text):
-            end = start + chunk_size
-            chunk = text[start:end]
-            
-            # Try to end at word boundary
-            if end < len(text) and not text[end].isspace():
-                last_space = chunk.rfind(' ')
-                if last_space > chunk_size * 0.7:  # Only if we don't lose too much
-                    chunk = chunk[:last_space]
-                    end = start + last_space
-            
-            chunks.append(chunk.strip())
-            
-            # Move start position with overlap
-            start = max(start + chunk_size - overlap, end)
-            
-            if start >= len(text):
-                break
-        
+        cur_parts, cur_len = [], 0
+
+        # The cut decision fires once per sentence, not once per byte, so
+        # the modulus must be scaled to sentence granularity: with ~80-char
+        # sentences, avg // 80 candidate cuts per avg chars of text gives
+        # chunks averaging around avg. Using avg itself as the modulus
+        # makes hash cuts a ~1/avg event and the max_size cap ends up
+        # deciding nearly every boundary, which reintroduces the
+        # position-dependent boundaries this method exists to avoid.
+        modulus = max(avg // 80, 1)
+
+        for sentence in _SENT_RE.split(text):
+            sentence = sentence.strip()
+            if not sentence:
+                continue
+
+            cur_parts.append(sentence)
+            cur_len += (1 if cur_len else 0) + len(sentence)
+
+            if cur_len < min_size:
+                continue
+
+            # Boundary decision depends only on the trailing bytes, not
+            # on where in the document this sentence landed
+            tail = sentence.encode('utf-8', 'ignore')[-48:]
+            fingerprint = int.from_bytes(
+                hashlib.blake2b(tail, digest_size=4).digest(), 'little'
+            )
+            if fingerprint % modulus == 0 or cur_len >= max_size:
+                chunks.append(' '.join(cur_parts))
+                cur_parts, cur_len = [], 0
+
+        if cur_parts:
+            chunks.append(' '.join(cur_parts))
+
         return [chunk for chunk in chunks if chunk.strip()]
+
+    def _fixed_size_chunk(self, text: str, chunk_size: int, overlap: int) -> List[str]:
+        """Fallback: Fixed-size chunking with overlap
+
+        The boundary walk runs over a uint8 view of the UTF-8 bytes so
+        Numba (when installed) compiles it to a native loop; without
+        Numba the same function runs as plain Python.
+        """
+        raw = text.encode('utf-8')
+        buf = np.frombuffer(raw, dtype=np.uint8)
+        spans = _fixed_spans(buf, chunk_size, overlap)
+        chunks = [raw[s:e].decode('utf-8', 'ignore').strip() for s, e in spans]
+        return [chunk for chunk in chunks if chunk]
     
     async def process_content(self, content: ContentResult) -> Dict[str, Any]:
         """Process and store content with embeddings"""
         print(f"   Processing content for embedding: {content.title}")
         
         try:
-            # Check if content already exists
-            existing = self.collection.get(
-                where={"content_hash": content.content_hash}
-            )
-            
-            if existing and len(existing['documents']) > 0:
+            await content.compute_hash()
+
+            # Check if content already exists (local filter, no Chroma scan)
+            if content.content_hash in self._hash_set:
                 print(f"     Content already vectorized: {content.title}")
                 return {
                     "status": "exists",
-                    "chunks": len(existing['documents']),
                     "content_hash": content.content_hash
                 }
             
-            # Chunk the content intelligently
-            chunks = self.smart_chunk(content.text, max_chunk_size=512)
+            # Chunk the content with content-defined boundaries so shared
+            # passages across pages produce identical, dedupe-able chunks
+            chunks = self._cdc_chunk(content.text)
+            if not chunks:
+                chunks = self.smart_chunk(content.text, max_chunk_size=512)
             
             if not chunks:
                 print(f"     No chunks generated for: {content.title}")
                 return {"status": "no_chunks", "content_hash": content.content_hash}
-            
+
+            # Scraped pages repeat navigation/boilerplate chunks; embed
+            # and store each distinct chunk only once
+            seen = set()
+            unique_chunks = []
+            for chunk in chunks:
+                chunk_key = xxhash.xxh3_64_intdigest(chunk)
+                if chunk_key not in seen:
+                    seen.add(chunk_key)
+                    unique_chunks.append(chunk)
+            if len(unique_chunks) < len(chunks):
+                print(f"     Dropped {len(chunks) - len(unique_chunks)} duplicate chunks")
+            chunks = unique_chunks
+
             print(f"     Generated {len(chunks)} chunks")
-            
-            # Generate embeddings for all chunks
-            embeddings = []
-            for i, chunk in enumerate(chunks):
+
+            # Pipeline embedding against vector writes: while one batch is
+            # being written, the next is already embedding, so throughput
+            # approaches max(embed_time, write_time) instead of their sum
+            batch_size = 32
+            total_chunks = len(chunks)
+            queue: asyncio.Queue = asyncio.Queue(maxsize=2)
+
+            async def _embed_batches():
                 try:
-                    embedding = await self.get_ollama_embedding(chunk)
-                    embeddings.append(embedding)
-                    print(f"   Embedded chunk {i+1}/{len(chunks)}")
-                except Exception as e:
-                    print(f"    Failed to embed chunk {i+1}: {e}")
-                    continue
-            
-            if not embeddings:
+                    for start in range(0, total_chunks, batch_size):
+                        batch = chunks[start:start + batch_size]
+                        try:
+                            batch_embs = await self.get_ollama_embeddings_batch(batch)
+                        except Exception as e:
+                            print(f"    Failed to embed batch at {start}: {e}")
+                            continue
+                        await queue.put((start, batch, batch_embs))
+                finally:
+                    await queue.put(None)
+
+            async def _write_batches() -> int:
+                stored = 0
+                while True:
+                    item = await queue.get()
+                    if item is None:
+                        return stored
+                    start, batch, batch_embs = item
+
+                    # Drop failed chunk/embedding pairs together; the
+                    # batch helper keeps positions aligned, so pairing by
+                    # index can never cross-wire chunks and embeddings
+                    kept = [
+                        (start + i, chunk, emb)
+                        for i, (chunk, emb) in enumerate(zip(batch, batch_embs))
+                        if emb is not None
+                    ]
+                    if not kept:
+                        continue
+
+                    # Normalize once at ingest and store as float16: cosine
+                    # becomes a plain dot product and vectors take half the
+                    # RAM and transfer
+                    emb_matrix = np.asarray([emb for _, _, emb in kept], dtype=np.float32)
+                    emb_matrix /= np.linalg.norm(emb_matrix, axis=1, keepdims=True) + 1e-8
+                    kept_embs = emb_matrix.astype(np.float16).tolist()
+
+                    async with self._buf_lock:
+                        self._buf["ids"].extend(
+                            f"{content.content_hash}_{chunk_id}" for chunk_id, _, _ in kept
+                        )
+                        self._buf["docs"].extend(chunk for _, chunk, _ in kept)
+                        self._buf["embs"].extend(kept_embs)
+                        self._buf["metas"].extend({
+                            "url": content.url,
+                            "title": content.title,
+                            "chunk_id": chunk_id,
+                            "content_hash": content.content_hash,
+                            "timestamp": content.timestamp,
+                            "total_chunks": total_chunks
+                        } for chunk_id, _, _ in kept)
+                        if len(self._buf["ids"]) >= self._flush_threshold:
+                            await asyncio.to_thread(self._flush_locked)
+                    stored += len(kept)
+
+            _, stored = await asyncio.gather(_embed_batches(), _write_batches())
+
+            if not stored:
                 print(f"    No embeddings generated for: {content.title}")
                 return {"status": "embedding_failed", "content_hash": content.content_hash}
-            
-            # Store in ChromaDB
-            chunk_ids = [f"{content.content_hash}_{i}" for i in range(len(chunks))]
-            metadatas = [{
-                "url": content.url,
-                "title": content.title,
-                "chunk_id": i,
-                "content_hash": content.content_hash,
-                "timestamp": content.timestamp,
-                "total_chunks": len(chunks)
-            } for i in range(len(chunks))]
-            
-            self.collection.add(
-                ids=chunk_ids,
-                documents=chunks[:len(embeddings)],  # Only add chunks that have embeddings
-                embeddings=embeddings,
-                metadatas=metadatas[:len(embeddings)]
-            )
-            
-            print(f"    Stored {len(embeddings)} chunks in vector DB")
+
+            self._remember_hash(content.content_hash)
+            self._urls.add(content.url)
+            self._titles.add(content.title)
+            print(f"    Stored {stored} chunks in vector DB")
             
             return {
                 "status": "success",
-                "chunks": len(embeddings),
+                "chunks": stored,
                 "content_hash": content.content_hash,
                 "url": content.url,
                 "title": content.title
@@ -253,19 +617,167 @@ class ContentVectorizer:
                 "content_hash": content.content_hash
             }
     
-    async def rag_search(self, query: str, max_results: int = 5, 
+    async def process_content_batch(self, contents: List[ContentResult],
+                                    batch_size: int = 32) -> List[Dict[str, Any]]:
+        """Process several documents through one embedding pipeline
+
+        Chunking per document but embedding the flattened chunk list
+        means /api/embed always sees full batches even when individual
+        pages are short, chunk dedupe works across the whole batch, and
+        the write buffer is flushed once at the end instead of per page.
+        Returns one result dict per input document, in order.
+        """
+        await asyncio.gather(*[content.compute_hash() for content in contents])
+
+        doc_results: List[Optional[Dict[str, Any]]] = [None] * len(contents)
+        stored_per_doc = [0] * len(contents)
+        items: List[tuple] = []  # (doc_idx, chunk_id, chunk, total_chunks)
+        seen = set()
+
+        for idx, content in enumerate(contents):
+            if content.content_hash in self._hash_set:
+                doc_results[idx] = {
+                    "status": "exists",
+                    "content_hash": content.content_hash
+                }
+                continue
+
+            chunks = self._cdc_chunk(content.text)
+            if not chunks:
+                chunks = self.smart_chunk(content.text, max_chunk_size=512)
+            if not chunks:
+                doc_results[idx] = {
+                    "status": "no_chunks",
+                    "content_hash": content.content_hash
+                }
+                continue
+
+            unique_chunks = []
+            for chunk in chunks:
+                chunk_key = xxhash.xxh3_64_intdigest(chunk)
+                if chunk_key not in seen:
+                    seen.add(chunk_key)
+                    unique_chunks.append(chunk)
+
+            total = len(unique_chunks)
+            if not total:
+                # Every chunk duplicated one queued earlier in this batch,
+                # so the content is already covered. Record the hash and
+                # report it as existing; calling it an embedding failure
+                # would leave the hash unrecorded and re-chunk the same
+                # page on every future call.
+                self._remember_hash(content.content_hash)
+                self._urls.add(content.url)
+                self._titles.add(content.title)
+                doc_results[idx] = {
+                    "status": "exists",
+                    "content_hash": content.content_hash
+                }
+                continue
+            for chunk_id, chunk in enumerate(unique_chunks):
+                items.append((idx, chunk_id, chunk, total))
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=2)
+
+        async def _embed_batches():
+            try:
+                for start in range(0, len(items), batch_size):
+                    batch = items[start:start + batch_size]
+                    try:
+                        batch_embs = await self.get_ollama_embeddings_batch(
+                            [item[2] for item in batch]
+                        )
+                    except Exception as e:
+                        print(f"    Failed to embed batch at {start}: {e}")
+                        continue
+                    await queue.put((batch, batch_embs))
+            finally:
+                await queue.put(None)
+
+        async def _write_batches():
+            while True:
+                queued = await queue.get()
+                if queued is None:
+                    return
+                batch, batch_embs = queued
+
+                # Drop failed item/embedding pairs together; positions in
+                # batch_embs stay aligned with the input texts
+                kept = [
+                    (item, emb) for item, emb in zip(batch, batch_embs)
+                    if emb is not None
+                ]
+                if not kept:
+                    continue
+
+                emb_matrix = np.asarray([emb for _, emb in kept], dtype=np.float32)
+                emb_matrix /= np.linalg.norm(emb_matrix, axis=1, keepdims=True) + 1e-8
+                kept_embs = emb_matrix.astype(np.float16).tolist()
+
+                async with self._buf_lock:
+                    for ((idx, chunk_id, chunk, total), _), emb in zip(kept, kept_embs):
+                        content = contents[idx]
+                        self._buf["ids"].append(f"{content.content_hash}_{chunk_id}")
+                        self._buf["docs"].append(chunk)
+                        self._buf["embs"].append(emb)
+                        self._buf["metas"].append({
+                            "url": content.url,
+                            "title": content.title,
+                            "chunk_id": chunk_id,
+                            "content_hash": content.content_hash,
+                            "timestamp": content.timestamp,
+                            "total_chunks": total
+                        })
+                        stored_per_doc[idx] += 1
+                    if len(self._buf["ids"]) >= self._flush_threshold:
+                        await asyncio.to_thread(self._flush_locked)
+
+        await asyncio.gather(_embed_batches(), _write_batches())
+        await self.flush()
+
+        for idx, content in enumerate(contents):
+            if doc_results[idx] is not None:
+                continue
+            if stored_per_doc[idx]:
+                self._remember_hash(content.content_hash)
+                self._urls.add(content.url)
+                self._titles.add(content.title)
+                doc_results[idx] = {
+                    "status": "success",
+                    "chunks": stored_per_doc[idx],
+                    "content_hash": content.content_hash,
+                    "url": content.url,
+                    "title": content.title
+                }
+            else:
+                doc_results[idx] = {
+                    "status": "embedding_failed",
+                    "content_hash": content.content_hash
+                }
+        return doc_results
+
+    async def rag_search(self, query: str, max_results: int = 5,
                         similarity_threshold: float = 0.1) -> RAGResult:
         """Perform RAG search with context retrieval"""
         print(f"RAG Search: {query}")
         
         try:
-            # Generate query embedding with search_query prefix
+            # Make any buffered writes visible before searching
+            await self.flush()
+
+            # Generate query embedding with search_query prefix, normalized
+            # to match the pre-normalized stored vectors
             query_embedding = await self.get_ollama_embedding(query, "search_query")
+            query_emb = np.asarray(query_embedding, dtype=np.float32)
+            query_embedding = (query_emb / (np.linalg.norm(query_emb) + 1e-8)).tolist()
             
-            # Search similar content in ChromaDB
-            results = self.collection.query(
+            # Search similar content in ChromaDB. The query is a blocking
+            # HNSW walk in Chroma's C++, so run it in a worker thread.
+            # Over-fetch so the MMR pass below has candidates to diversify.
+            results = await asyncio.to_thread(
+                self.collection.query,
                 query_embeddings=[query_embedding],
-                n_results=max_results,
+                n_results=max_results * 3,
                 include=["documents", "metadatas", "distances", "embeddings"]
             )
             
@@ -277,41 +789,45 @@ class ContentVectorizer:
                     generated_response="No relevant information found in the knowledge base."
                 )
             
-            # Calculate cosine similarities with normalization
-            filtered_chunks = []
-            filtered_sources = []
-            similarity_scores = []
-            
-            # Get stored embeddings for similarity calculation
-            stored_embeddings = results.get('embeddings', [None])[0] if 'embeddings' in results else None
-            
-            for i, (doc, metadata, distance) in enumerate(zip(
-                results['documents'][0],
-                results['metadatas'][0], 
-                results['distances'][0]
-            )):
-                # Calculate proper cosine similarity
-                if stored_embeddings is not None and len(stored_embeddings) > i:
-                    stored_emb = np.array(stored_embeddings[i])
-                    query_emb = np.array(query_embedding)
-                    
-                    # Normalize embeddings
-                    stored_norm = stored_emb / (np.linalg.norm(stored_emb) + 1e-8)
-                    query_norm = query_emb / (np.linalg.norm(query_emb) + 1e-8)
-                    
-                    # Calculate cosine similarity
-                    cosine_similarity = np.dot(query_norm, stored_norm)
-                    similarity = float(cosine_similarity)
-                else:
-                    # Fallback: convert ChromaDB distance to similarity (lower distance = higher similarity)
-                    similarity = max(0, 1 - distance)
-                
+            documents = results['documents'][0]
+            metadatas = results['metadatas'][0]
+            distances = results['distances'][0]
+            stored_embeddings = results.get('embeddings')
+            stored_embeddings = stored_embeddings[0] if stored_embeddings is not None else None
+
+            # In a cosine collection similarity is just 1 - distance; a
+            # legacy l2 collection needs cosine recomputed from the stored
+            # embeddings. Either way score off the event loop so large
+            # result sets don't stall concurrent coroutines.
+            if (not self._cosine_space and stored_embeddings is not None
+                    and len(stored_embeddings) == len(documents)):
+                similarities, keep = await asyncio.to_thread(
+                    _cosine_score, stored_embeddings, query_embedding,
+                    similarity_threshold
+                )
+            else:
+                similarities, keep = await asyncio.to_thread(
+                    _score, distances, similarity_threshold
+                )
+
+            for i, similarity in enumerate(similarities):
                 print(f"   Chunk {i+1}: similarity = {similarity:.3f}")
-                
-                if similarity >= similarity_threshold:
-                    filtered_chunks.append(doc)
-                    filtered_sources.append(metadata)
-                    similarity_scores.append(similarity)
+
+            # Re-rank the passing candidates for diversity before cutting
+            # down to max_results
+            if len(keep) > max_results:
+                if stored_embeddings is not None and len(stored_embeddings) == len(documents):
+                    candidate_embs = np.asarray(stored_embeddings, dtype=np.float32)[keep]
+                    order = await asyncio.to_thread(
+                        _mmr, candidate_embs, similarities[keep], max_results
+                    )
+                    keep = [int(keep[i]) for i in order]
+                else:
+                    keep = keep[:max_results]
+
+            filtered_chunks = [documents[i] for i in keep]
+            filtered_sources = [metadatas[i] for i in keep]
+            similarity_scores = [float(similarities[i]) for i in keep]
             
             if not filtered_chunks:
                 return RAGResult(
@@ -352,21 +868,11 @@ class ContentVectorizer:
     def get_knowledge_stats(self) -> Dict[str, Any]:
         """Get vectorstore statistics"""
         try:
-            count = self.collection.count()
-            
-            # Get unique sources
-            all_metadata = self.collection.get(include=["metadatas"])
-            unique_urls = set()
-            unique_titles = set()
-            
-            for metadata in all_metadata.get('metadatas', []):
-                unique_urls.add(metadata.get('url', ''))
-                unique_titles.add(metadata.get('title', ''))
-            
+            # Counters are maintained on every add, so no metadata scan
             return {
-                "total_chunks": count,
-                "unique_sources": len(unique_urls),
-                "unique_titles": len(unique_titles),
+                "total_chunks": self.collection.count(),
+                "unique_sources": len(self._urls),
+                "unique_titles": len(self._titles),
                 "embedding_model": self.embedding_model,
                 "collection_name": self.collection.name
             }
@@ -8,35 +8,59 @@ logger = logging.getLogger(__name__)
 class WebSearchService:
     def __init__(self):
         self.base_url = os.getenv("WEBSEARCH_URL", "http://localhost:8055")
-    
+        self._client = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Lazily create one pooled client shared by every call"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=30,
+                limits=httpx.Limits(
+                    max_keepalive_connections=40,
+                    max_connections=100,
+                    keepalive_expiry=30
+                )
+            )
+        return self._client
+
+    async def aclose(self):
+        """Close the pooled HTTP client"""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+
     async def web_search(self, query: str, max_results: int = 5) -> Dict[str, Any]:
         """Search the web using SearXNG"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}/search",
-                    json={"query": query, "max_results": max_results},
-                    timeout=30
-                )
-                return response.json()
+            response = await self._get_client().post(
+                "/search",
+                json={"query": query, "max_results": max_results}
+            )
+            return response.json()
         except Exception as e:
             logger.error(f"Web search failed: {e}")
             return {"error": str(e), "results": []}
-    
+
     async def extract_content(self, url: str) -> Dict[str, Any]:
         """Extract content from URL"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}/extract",
-                    json={"url": url},
-                    timeout=30
-                )
-                return response.json()
+            response = await self._get_client().post(
+                "/extract",
+                json={"url": url}
+            )
+            return response.json()
         except Exception as e:
             logger.error(f"Content extraction failed: {e}")
             return {"error": str(e), "text": "", "title": ""}
-    
+
     async def fetch_content(self, url: str) -> Dict[str, Any]:
         """Alias for extract_content for backward compatibility"""
-        return await self.extract_content(url)
\ No newline at end of file
+        return await self.extract_content(url)
+
+    async def health_check(self) -> bool:
+        """Check the extractor service over the shared connection pool"""
+        try:
+            response = await self._get_client().get("/health", timeout=5)
+            return response.status_code == 200
+        except Exception:
+            return False
@@ -0,0 +1,393 @@
+"""
+Smart Ollama Chat with WebSearch MCP
+Natural language chat that auto-detects search and extract intent
+"""
+
+import argparse
+import asyncio
+import re
+import sys
+import os
+import time
+import httpx
+import orjson
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+
+_URL_RE = re.compile(r'https?://[^\s]+')
+
+# Keyword alternations: one automaton pass over the message instead of a
+# substring scan per keyword
+_EXTRACT_RE = re.compile(r'extract|read|summarize|get content|open|fetch')
+_SEARCH_RE = re.compile(r'search|find|look for|look up|google|latest news|current|today|recent')
+_WH_RE = re.compile(r'\b(?:what|how|when|where|why|tell me)\b')
+_TOPIC_RE = re.compile(r'faps|research|projects|recent|latest')
+
+_COMMANDS = {
+    '/search': 'search',
+    '/extract': 'extract',
+    '/health': 'health',
+    '/help': 'help',
+    '/exit': 'exit',
+    '/quit': 'exit',
+}
+
+_SEP_50 = "-" * 50
+_SEP_55 = "=" * 55
+
+_HELP_TEXT = """
+Smart WebSearch Chat - Natural Language Interface
+==================================================
+Just type naturally, for example:
+  search for the latest python release
+  what are the recent AI research projects?
+  read https://example.com/article
+
+Commands:
+  /search <query>  - Search the web
+  /extract <url>   - Extract content from a URL
+  /health          - Check websearch service status
+  /help            - Show this help
+  /exit            - Quit
+"""
+
+_BANNER = """
+Smart Ollama Chat with WebSearch
+========================================
+Model: {model}
+WebSearch service: {base_url}"""
+
+
+class SmartWebSearchMCP:
+    """Client for the websearch/extractor service"""
+
+    def __init__(self, base_url: str = None):
+        if base_url is None:
+            base_url = os.getenv("WEBSEARCH_URL", "http://localhost:8055")
+        self.base_url = base_url
+        # One persistent client shared by every call; keep-alive avoids a
+        # fresh TCP handshake per search/extract in the chat hot path
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=httpx.Timeout(connect=5, read=30, write=10, pool=5),
+            limits=httpx.Limits(
+                max_keepalive_connections=10,
+                max_connections=20,
+                keepalive_expiry=30
+            )
+        )
+        # Small LRU with TTL so re-running a search or re-reading a URL
+        # within a session skips the network entirely
+        self._cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._cache_size = 64
+        self._cache_ttl = 300.0
+
+    def _cache_get(self, key: tuple):
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        stamp, value = entry
+        if time.monotonic() - stamp > self._cache_ttl:
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return value
+
+    def _cache_put(self, key: tuple, value):
+        self._cache[key] = (time.monotonic(), value)
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+
+    async def aclose(self):
+        """Close the pooled HTTP client"""
+        await self._client.aclose()
+
+    async def web_search(self, query: str, max_results: int = 5) -> Dict[str, Any]:
+        """Search the web via the websearch service"""
+        cache_key = ("search", query, max_results)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+
+        try:
+            response = await self._client.post(
+                "/search",
+                content=orjson.dumps({"query": query, "max_results": max_results}),
+                headers={"Content-Type": "application/json"}
+            )
+            result = orjson.loads(response.content)
+            if "error" not in result:
+                self._cache_put(cache_key, result)
+            return result
+        except Exception as e:
+            return {"error": str(e), "results": []}
+
+    async def fetch_content(self, url: str, max_chars: int = 8192) -> Dict[str, Any]:
+        """Extract readable content from a URL, truncated server-side
+
+        The extractor clips the text to max_chars before responding, so
+        a multi-megabyte article never crosses the wire just to be cut
+        down to a preview or an LLM context window here.
+        """
+        cache_key = ("extract", url, max_chars)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+
+        try:
+            response = await self._client.post(
+                "/extract",
+                content=orjson.dumps({"url": url, "max_chars": max_chars}),
+                headers={"Content-Type": "application/json"}
+            )
+            result = orjson.loads(response.content)
+            if "error" not in result and result.get("text"):
+                self._cache_put(cache_key, result)
+            return result
+        except Exception as e:
+            return {"error": str(e), "text": "", "title": ""}
+
+    async def health_check(self) -> bool:
+        """Check if the websearch service is reachable"""
+        try:
+            response = await self._client.get("/health", timeout=5)
+            return response.status_code == 200
+        except Exception:
+            return False
+
+
+class SmartOllamaChat:
+    """Interactive chat that routes between search, extract, and plain chat"""
+
+    def __init__(self, model_name: str = "qwen3:8b"):
+        self.model_name = model_name
+        self.ollama_url = os.getenv("OLLAMA_URL", "http://localhost:11434")
+        self.websearch = SmartWebSearchMCP()
+
+    def detect_intent(self, user_input: str) -> Dict[str, Any]:
+        """Figure out whether the user wants a search, an extract, or chat"""
+        user_lower = user_input.lower()
+
+        # Slash commands: O(1) dict dispatch instead of startswith chains.
+        # Reuse the already-lowered input for the verb; the argument keeps
+        # its original casing (URLs are case-sensitive).
+        if user_input.startswith('/'):
+            cmd_end = user_input.find(' ')
+            if cmd_end == -1:
+                cmd, arg = user_lower, ''
+            else:
+                cmd, arg = user_lower[:cmd_end], user_input[cmd_end + 1:].strip()
+            action = _COMMANDS.get(cmd)
+            if action:
+                return {"action": action, "query": arg, "url": arg}
+            return {"action": "chat", "query": user_input}
+
+        # Collect URLs and the URL-free remainder in one pass instead of
+        # a findall plus a later sub over the same string
+        urls = []
+        parts = []
+        last = 0
+        for match in _URL_RE.finditer(user_input):
+            urls.append(match.group())
+            parts.append(user_input[last:match.start()])
+            last = match.end()
+        if urls:
+            parts.append(user_input[last:])
+            stripped = ''.join(parts).strip()
+        else:
+            stripped = user_input
+
+        # URL plus an extraction verb -> extract
+        if urls and _EXTRACT_RE.search(user_lower):
+            return {"action": "extract", "url": urls[0]}
+
+        # Explicit search phrasing -> search
+        if _SEARCH_RE.search(user_lower):
+            return {"action": "search", "query": stripped or user_input}
+
+        # Questions about timely topics -> search
+        if _WH_RE.search(user_lower) and _TOPIC_RE.search(user_lower):
+            return {"action": "search", "query": user_input}
+
+        # Bare URL -> extract
+        if urls:
+            return {"action": "extract", "url": urls[0]}
+
+        return {"action": "chat", "query": user_input}
+
+    async def chat_with_ollama(self, prompt: str, context: str = "") -> str:
+        """Generate a response from Ollama, optionally grounded in context"""
+        if context:
+            full_prompt = (
+                f"Use the following web content to answer.\n\n"
+                f"{context}\n\nQuestion: {prompt}"
+            )
+        else:
+            full_prompt = prompt
+
+        try:
+            async with httpx.AsyncClient(timeout=120.0) as client:
+                response = await client.post(
+                    f"{self.ollama_url}/api/generate",
+                    json={
+                        "model": self.model_name,
+                        "prompt": full_prompt,
+                        "stream": False
+                    }
+                )
+                if response.status_code != 200:
+                    return f"Ollama error: {response.status_code}"
+                return response.json().get("response", "No response from model")
+        except Exception as e:
+            return f"Chat error: {e}"
+
+    async def auto_extract_top_results(self, results: List[Dict], max_extracts: int = 2) -> List[str]:
+        """Pull full content for the top search results concurrently"""
+        targets = [r for r in results[:max_extracts] if r.get('url')]
+        if not targets:
+            return []
+
+        for i, result in enumerate(targets, 1):
+            print(f"   Extracting {i}/{len(targets)}: {result['url']}")
+
+        contents = await asyncio.gather(
+            *[self.websearch.fetch_content(r['url']) for r in targets],
+            return_exceptions=True
+        )
+
+        extracted = []
+        for result, content in zip(targets, contents):
+            if isinstance(content, BaseException):
+                print(f"   Extraction failed for {result['url']}: {content}")
+                continue
+            if "error" in content or not content.get("text"):
+                print(f"   Extraction failed for {result['url']}")
+                continue
+            extracted.append(
+                f"Source: {content.get('title', 'No Title')} ({result['url']})\n{content.get('text', '')}"
+            )
+        return extracted
+
+    async def smart_search(self, query: str):
+        """Search, show results, auto-extract the top hits, and summarize"""
+        print(f"\nSearching: {query}")
+        results_data = await self.websearch.web_search(query, max_results=5)
+
+        if "error" in results_data:
+            print(f"Search failed: {results_data['error']}")
+            return
+
+        results = results_data.get("results", [])
+        if not results:
+            print("No results found.")
+            return
+
+        # Kick off the top-result extractions immediately so their
+        # network time overlaps printing the result list
+        extract_task = asyncio.create_task(self.auto_extract_top_results(results))
+
+        # Emit all result lines in one write: one stdout lock/flush
+        # instead of four per result
+        buf = [f"\nFound {len(results)} results:", _SEP_50]
+        for i, result in enumerate(results, 1):
+            c = result.get('content') or ''
+            content = (c[:150] + "...") if len(c) > 150 else (c or 'No description')
+            buf.append(f"{i}. {result.get('title', 'No Title')}")
+            buf.append(f"   {result.get('url', '')}")
+            buf.append(f"   {content}")
+            buf.append("")
+        sys.stdout.write('\n'.join(buf) + '\n')
+
+        extracted = await extract_task
+        if extracted:
+            print(f"\nSummarizing with {self.model_name}...")
+            summary = await self.chat_with_ollama(
+                f"Summarize the key information relevant to: {query}",
+                "\n\n".join(extracted)
+            )
+            print("\n" + _SEP_55)
+            print(summary)
+            print(_SEP_55)
+
+    async def handle_extract(self, url: str):
+        """Extract one URL and show a preview"""
+        print(f"\nExtracting: {url}")
+        content = await self.websearch.fetch_content(url)
+
+        if "error" in content:
+            print(f"Extraction failed: {content['error']}")
+            return
+
+        title = content.get('title', 'No Title')
+        text = content.get('text', '')
+        preview = text if len(text) <= 500 else text[:500] + "..."
+        sys.stdout.write(
+            f"\n{title}\n{'-' * len(title)}\nLength: {len(text)} characters\n\n{preview}\n"
+        )
+
+    def show_help(self):
+        """Print command help"""
+        print(_HELP_TEXT)
+
+    async def chat_loop(self):
+        """Interactive REPL"""
+        # Start the health probe first so its TCP handshake warms the
+        # connection pool while the banner prints
+        health_task = asyncio.create_task(self.websearch.health_check())
+        print(_BANNER.format(model=self.model_name, base_url=self.websearch.base_url))
+
+        healthy = await health_task
+        print(f"Service status: {'online' if healthy else 'OFFLINE - check docker compose'}")
+        print("Type /help for commands.\n")
+
+        try:
+            while True:
+                try:
+                    # Read in a worker thread so the event loop keeps
+                    # serving background tasks while waiting on keystrokes
+                    user_input = (await asyncio.to_thread(input, "You: ")).strip()
+                except (KeyboardInterrupt, EOFError):
+                    break
+
+                if not user_input:
+                    continue
+
+                intent = self.detect_intent(user_input)
+                action = intent["action"]
+
+                if action == "exit":
+                    break
+                elif action == "help":
+                    self.show_help()
+                elif action == "health":
+                    healthy = await self.websearch.health_check()
+                    print(f"Service status: {'online' if healthy else 'offline'}")
+                elif action == "search":
+                    await self.smart_search(intent["query"])
+                elif action == "extract":
+                    await self.handle_extract(intent["url"])
+                else:
+                    response = await self.chat_with_ollama(intent["query"])
+                    print(f"\n{self.model_name}:")
+                    print(response)
+                    print("")
+        finally:
+            print("\nGoodbye!")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Smart Ollama chat with web search")
+    parser.add_argument("--model", default="qwen3:8b", help="Ollama model name")
+    args = parser.parse_args()
+
+    chat = SmartOllamaChat(args.model)
+    try:
+        await chat.chat_loop()
+    finally:
+        # The pooled client must close on the same event loop it was
+        # used on, so tie its lifetime to main()'s loop explicitly
+        await chat.websearch.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,939 @@
+"""
+In-process MCP client that exposes the websearch/RAG tools to Ollama
+Tools run directly against the service classes instead of stdio servers
+"""
+
+import asyncio
+import hashlib
+import io
+import sqlite3
+import time
+import httpx
+import numpy as np
+import orjson
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional
+import logging
+import sys
+import os
+
+# uvloop meaningfully speeds up this HTTP-heavy event loop; fall back
+# to the default loop where it isn't available (e.g. Windows)
+try:
+    import uvloop
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+except ImportError:
+    pass
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
+
+from services.vectorstore import ContentVectorizer, ContentResult
+from services.websearch import WebSearchService
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("mcp-client")
+
+# Random-projection LSH parameters for the semantic answer cache
+_SEM_K = 8
+_SEM_TABLES = 4
+_SEM_CACHE_SIZE = 256
+_SEM_TTL = 300.0
+_SEM_MIN_COSINE = 0.95
+
+# Tools whose output is already a formatted answer; a second Ollama
+# pass adds latency without adding information
+TOOLS_SELF_CONTAINED = {"smart_answer", "research_query"}
+
+# Turns kept verbatim in the prompt; older ones are folded into a
+# compact summary so per-turn prefill stays bounded
+MAX_HISTORY_TURNS = 6
+
+# Static system prompt: keep this free of anything dynamic (timestamps,
+# results) so Ollama's prefix KV cache stays valid across turns
+_SYSTEM_PROMPT = (
+    "You are a research assistant with web search and a local knowledge "
+    "base. Use web_search for current information, rag_search for stored "
+    "knowledge, research_query to gather and store multiple sources, and "
+    "smart_answer for questions the knowledge base may already cover. "
+    "Answer directly when no tool is needed."
+)
+
+# Ollama function-calling schemas; built once at import, never mutated
+_TOOLS = (
+    {
+        "type": "function",
+        "function": {
+            "name": "web_search",
+            "description": "Search the web for current information",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "query": {"type": "string", "description": "Search query"},
+                    "max_results": {"type": "integer", "description": "Max results (default 5)"}
+                },
+                "required": ["query"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "extract_content",
+            "description": "Extract readable content from a web page",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "url": {"type": "string", "description": "URL to extract"}
+                },
+                "required": ["url"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "rag_search",
+            "description": "Search the local knowledge base",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "query": {"type": "string", "description": "Search query"},
+                    "max_results": {"type": "integer", "description": "Max results (default 5)"}
+                },
+                "required": ["query"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "store_content",
+            "description": "Store content in the knowledge base",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "url": {"type": "string", "description": "Source URL"},
+                    "title": {"type": "string", "description": "Content title"},
+                    "text": {"type": "string", "description": "Content text"}
+                },
+                "required": ["url", "title", "text"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "knowledge_stats",
+            "description": "Get knowledge base statistics",
+            "parameters": {"type": "object", "properties": {}}
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "research_query",
+            "description": "Search, extract and store multiple sources for a topic",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "query": {"type": "string", "description": "Research topic"},
+                    "max_sources": {"type": "integer", "description": "Sources to process (default 3)"}
+                },
+                "required": ["query"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "smart_answer",
+            "description": "Answer from the knowledge base, falling back to the web",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "question": {"type": "string", "description": "Question to answer"}
+                },
+                "required": ["question"]
+            }
+        }
+    }
+)
+
+_TOOL_NAMES = tuple(tool["function"]["name"] for tool in _TOOLS)
+
+# Per-tool argument defaults, applied once in call_tool so handlers read
+# complete arguments instead of repeating scattered .get() fallbacks
+_TOOL_ARG_DEFAULTS = {
+    "web_search": {"query": "", "max_results": 5},
+    "extract_content": {"url": ""},
+    "rag_search": {"query": "", "max_results": 5},
+    "store_content": {"url": "", "title": "", "text": ""},
+    "knowledge_stats": {},
+    "research_query": {"query": "", "max_sources": 3},
+    "smart_answer": {"question": ""},
+}
+
+
+class MCPClient:
+    def __init__(self, config_file: str = "mcp_servers_config.json"):
+        with open(config_file, 'rb') as f:
+            self.config = orjson.loads(f.read())
+
+        self.ollama_url = self._get_ollama_url()
+        self.current_model = self.config["llm"]["model"]
+        self.available_models = self.config.get("availableModels", [])
+        self.tools: List[Dict] = []
+
+        # One pooled client for every Ollama call; both round-trips of a
+        # tool turn reuse the same warm connection
+        self._http = httpx.AsyncClient(
+            base_url=self.ollama_url,
+            timeout=httpx.Timeout(120.0, connect=5.0),
+            limits=httpx.Limits(
+                max_keepalive_connections=16,
+                max_connections=32,
+                keepalive_expiry=60.0
+            )
+        )
+
+        # Services are created once and reused; the vectorizer in
+        # particular opens Chroma and warms the embedding path
+        self._websearch = None
+        self._vectorizer = None
+        self._service_lock = asyncio.Lock()
+
+        # Semantic cache: near-paraphrase questions short-circuit to the
+        # previous tool result instead of re-running embed+ANN+rerank.
+        # Entries are keyed by an 8-byte hash of the query embedding and
+        # bucketed under random-projection signatures for candidate lookup.
+        self._sem_planes: Optional[np.ndarray] = None
+        self._sem_entries: "OrderedDict[bytes, tuple]" = OrderedDict()
+        self._sem_buckets: Dict[tuple, set] = {}
+
+        # The semantic cache persists across restarts so a fresh process
+        # doesn't pay full cold cost for questions it answered last run
+        os.makedirs("./data", exist_ok=True)
+        self._cache_db = sqlite3.connect("./data/mcp_cache.sqlite")
+        self._cache_db.execute("PRAGMA journal_mode=WAL")
+        self._cache_db.execute("PRAGMA synchronous=NORMAL")
+        self._cache_db.execute(
+            "CREATE TABLE IF NOT EXISTS semantic_cache("
+            "hash BLOB PRIMARY KEY, embedding BLOB, response TEXT, ts REAL)"
+        )
+        self._cache_db.commit()
+        self._load_sem_cache()
+
+        # Stable system prefix + rolling history; the unchanged prefix
+        # lets Ollama reuse its prefilled KV cache on every turn
+        self._system_msg = {"role": "system", "content": _SYSTEM_PROMPT}
+        self._history: List[Dict] = []
+        self._memory_msg: Optional[Dict] = None
+
+        # Fire-and-forget tasks are held here until they finish; asyncio
+        # keeps only a weak reference, so an unreferenced task can be
+        # garbage-collected mid-flight and silently never run to completion
+        self._background_tasks: set = set()
+
+        # One dict lookup to route a tool call instead of an elif cascade
+        self._dispatch = {
+            "web_search": self._tool_web_search,
+            "extract_content": self._tool_extract_content,
+            "rag_search": self._tool_rag_search,
+            "store_content": self._tool_store_content,
+            "knowledge_stats": self._tool_knowledge_stats,
+            "research_query": self._tool_research_query,
+            "smart_answer": self._tool_smart_answer,
+        }
+
+    def _load_sem_cache(self):
+        """Reload recent semantic-cache entries from disk"""
+        cutoff = time.time() - 7 * 86400
+        self._cache_db.execute(
+            "DELETE FROM semantic_cache WHERE ts <= ?", (cutoff,)
+        )
+        self._cache_db.commit()
+        rows = self._cache_db.execute(
+            "SELECT hash, embedding, response FROM semantic_cache "
+            "ORDER BY ts DESC LIMIT ?", (_SEM_CACHE_SIZE,)
+        ).fetchall()
+        if not rows:
+            return
+        # Rows written under a different embedding model have a different
+        # dimension and can never match; keep only rows agreeing with the
+        # most recent one and purge the rest from disk
+        dim_bytes = len(rows[0][1])
+        stale = [(key,) for key, emb_bytes, _ in rows if len(emb_bytes) != dim_bytes]
+        if stale:
+            self._cache_db.executemany(
+                "DELETE FROM semantic_cache WHERE hash = ?", stale
+            )
+            self._cache_db.commit()
+        # Oldest first so LRU order matches recency
+        for key, emb_bytes, response in reversed(rows):
+            if len(emb_bytes) != dim_bytes:
+                continue
+            embedding = np.frombuffer(emb_bytes, dtype=np.float16).astype(np.float32)
+            self._sem_entries[key] = (embedding, response, time.monotonic())
+            for table, sig in enumerate(self._sem_signatures(embedding)):
+                self._sem_buckets.setdefault((table, sig), set()).add(key)
+
+    def _sem_signatures(self, embedding: np.ndarray) -> List[bytes]:
+        """Hash an embedding into one signature per LSH table"""
+        if (self._sem_planes is not None
+                and self._sem_planes.shape[2] != embedding.shape[0]):
+            # The embedding model changed out from under the persisted
+            # cache; stale entries can never match, so reset instead of
+            # raising on every tool call until the DB is deleted by hand
+            self._sem_reset()
+        if self._sem_planes is None:
+            rng = np.random.default_rng(12345)
+            self._sem_planes = rng.standard_normal(
+                (_SEM_TABLES, _SEM_K, embedding.shape[0])
+            ).astype(np.float32)
+        bits = (self._sem_planes @ embedding) > 0
+        return [np.packbits(table).tobytes() for table in bits]
+
+    def _sem_reset(self):
+        """Drop the semantic cache, in memory and on disk"""
+        self._sem_planes = None
+        self._sem_entries.clear()
+        self._sem_buckets.clear()
+        self._cache_db.execute("DELETE FROM semantic_cache")
+        self._cache_db.commit()
+
+    def _sem_get(self, embedding: np.ndarray) -> Optional[str]:
+        """Return a cached response for a near-identical query, if any"""
+        now = time.monotonic()
+        candidates = set()
+        for table, sig in enumerate(self._sem_signatures(embedding)):
+            candidates.update(self._sem_buckets.get((table, sig), ()))
+        for key in candidates:
+            entry = self._sem_entries.get(key)
+            if entry is None:
+                continue
+            cached_emb, response, ts = entry
+            if now - ts > _SEM_TTL:
+                self._sem_evict(key)
+                continue
+            # Embeddings are unit-normalized, so the dot is the cosine
+            if float(cached_emb @ embedding) >= _SEM_MIN_COSINE:
+                self._sem_entries.move_to_end(key)
+                return response
+        return None
+
+    def _sem_put(self, embedding: np.ndarray, response: str):
+        """Insert a response into the semantic cache"""
+        key = hashlib.blake2b(embedding.tobytes(), digest_size=8).digest()
+        self._sem_entries[key] = (embedding, response, time.monotonic())
+        self._sem_entries.move_to_end(key)
+        for table, sig in enumerate(self._sem_signatures(embedding)):
+            self._sem_buckets.setdefault((table, sig), set()).add(key)
+        while len(self._sem_entries) > _SEM_CACHE_SIZE:
+            self._sem_evict(next(iter(self._sem_entries)))
+        # float16 halves the stored vector; precision loss is far below
+        # the 0.95 cosine threshold
+        self._cache_db.execute(
+            "INSERT OR REPLACE INTO semantic_cache VALUES (?, ?, ?, ?)",
+            (key, embedding.astype(np.float16).tobytes(), response, time.time())
+        )
+        self._cache_db.commit()
+
+    def _sem_evict(self, key: bytes):
+        """Drop one cache entry and its bucket references"""
+        entry = self._sem_entries.pop(key, None)
+        if entry is None:
+            return
+        for table, sig in enumerate(self._sem_signatures(entry[0])):
+            bucket = self._sem_buckets.get((table, sig))
+            if bucket:
+                bucket.discard(key)
+                if not bucket:
+                    del self._sem_buckets[(table, sig)]
+
+    async def _query_embedding(self, text: str) -> Optional[np.ndarray]:
+        """Unit-normalized query embedding, or None if the embedder fails"""
+        vectorizer = await self._get_vectorizer()
+        raw = await vectorizer.get_ollama_embedding(text, "search_query")
+        if not raw:
+            return None
+        embedding = np.asarray(raw, dtype=np.float32)
+        norm = np.linalg.norm(embedding)
+        if norm > 0:
+            embedding /= norm
+        return embedding
+
+    async def _get_websearch(self):
+        """Return the shared WebSearchService, creating it on first use"""
+        if self._websearch is None:
+            async with self._service_lock:
+                if self._websearch is None:
+                    self._websearch = WebSearchService()
+        return self._websearch
+
+    async def _get_vectorizer(self):
+        """Return the shared ContentVectorizer, creating it on first use"""
+        if self._vectorizer is None:
+            async with self._service_lock:
+                if self._vectorizer is None:
+                    self._vectorizer = await asyncio.to_thread(
+                        ContentVectorizer, chroma_path="./data/chroma_db"
+                    )
+        return self._vectorizer
+
+    def _get_ollama_url(self) -> str:
+        """Auto-detect environment and return appropriate Ollama URL"""
+        base_url = self.config["llm"]["baseUrl"]
+        if self._is_running_in_docker():
+            if "localhost" in base_url:
+                return base_url.replace("localhost", "host.docker.internal")
+            return base_url
+        if "host.docker.internal" in base_url:
+            return base_url.replace("host.docker.internal", "localhost")
+        return base_url
+
+    def _is_running_in_docker(self) -> bool:
+        """Detect if running inside a Docker container"""
+        try:
+            if os.path.exists('/.dockerenv'):
+                return True
+            if os.path.exists('/proc/self/cgroup'):
+                with open('/proc/self/cgroup', 'r') as f:
+                    return 'docker' in f.read().lower()
+            return bool(os.environ.get('DOCKER_CONTAINER'))
+        except Exception:
+            return False
+
+    def initialize_tools(self):
+        """Expose the static tool list to Ollama"""
+        self.tools = list(_TOOLS)
+        # ~2KB of schema that never changes; serialize it once
+        self._tools_blob = orjson.dumps(self.tools)
+
+    async def call_tool(self, tool_name: str, arguments: Dict) -> str:
+        """Execute a tool call against the local services"""
+        handler = self._dispatch.get(tool_name)
+        if handler is None:
+            return f"Unknown tool: {tool_name}"
+        defaults = _TOOL_ARG_DEFAULTS[tool_name]
+        coerced = {
+            key: arguments.get(key, default)
+            for key, default in defaults.items()
+        }
+        try:
+            return await handler(coerced)
+        except Exception as e:
+            logger.error(f"Tool call failed: {e}")
+            return f"Tool execution failed: {e}"
+
+    async def _tool_web_search(self, arguments: Dict) -> str:
+        websearch = await self._get_websearch()
+        query = arguments["query"]
+        max_results = arguments["max_results"]
+        results = await websearch.web_search(query, max_results)
+        if "error" in results:
+            return f"Web search failed: {results['error']}"
+        lines = []
+        for i, result in enumerate(results.get("results", []), 1):
+            content = result.get('content') or 'No description'
+            preview = f"{content[:200]}..." if len(content) > 200 else content
+            lines.append(
+                f"{i}. {result.get('title', 'No Title')}\n"
+                f"   URL: {result.get('url', '')}\n"
+                f"   {preview}"
+            )
+        return "\n".join(lines) or "No results found."
+
+    async def _tool_extract_content(self, arguments: Dict) -> str:
+        websearch = await self._get_websearch()
+        url = arguments["url"]
+        content = await websearch.extract_content(url)
+        if "error" in content:
+            return f"Extraction failed: {content['error']}"
+        return (
+            f"Title: {content.get('title', 'No Title')}\n"
+            f"URL: {url}\n\n{content.get('text', '')}"
+        )
+
+    async def _tool_rag_search(self, arguments: Dict) -> str:
+        vectorizer = await self._get_vectorizer()
+        query = arguments["query"]
+        max_results = arguments["max_results"]
+
+        query_emb = await self._query_embedding(query)
+        if query_emb is not None:
+            cached = self._sem_get(query_emb)
+            if cached is not None:
+                return cached
+
+        rag_result = await vectorizer.rag_search(query, max_results)
+        if not rag_result.retrieved_chunks:
+            return f"No relevant information in knowledge base for: {query}"
+        lines = []
+        for i, (chunk, source, score) in enumerate(zip(
+            rag_result.retrieved_chunks,
+            rag_result.sources,
+            rag_result.similarity_scores
+        ), 1):
+            preview = f"{chunk[:300]}..." if len(chunk) > 300 else chunk
+            lines.append(
+                f"{i}. {source.get('title', 'No Title')} (Similarity: {score:.3f})\n"
+                f"   URL: {source.get('url', '')}\n"
+                f"   {preview}"
+            )
+        formatted = "\n".join(lines)
+        if query_emb is not None:
+            self._sem_put(query_emb, formatted)
+        return formatted
+
+    async def _tool_store_content(self, arguments: Dict) -> str:
+        vectorizer = await self._get_vectorizer()
+        content_result = ContentResult(
+            url=arguments["url"],
+            title=arguments["title"],
+            text=arguments["text"],
+            timestamp=time.time()
+        )
+        result = await vectorizer.process_content(content_result)
+        return f"Storage result: {result.get('status')} ({result.get('chunks', 0)} chunks)"
+
+    async def _tool_knowledge_stats(self, arguments: Dict) -> str:
+        vectorizer = await self._get_vectorizer()
+        stats = vectorizer.get_knowledge_stats()
+        return (
+            f"Knowledge base: {stats.get('total_chunks', 0)} chunks from "
+            f"{stats.get('unique_sources', 0)} sources "
+            f"(model: {stats.get('embedding_model', 'unknown')})"
+        )
+
+    async def _tool_research_query(self, arguments: Dict) -> str:
+        websearch = await self._get_websearch()
+        vectorizer = await self._get_vectorizer()
+
+        query = arguments["query"]
+        max_sources = arguments["max_sources"]
+
+        search_results = await websearch.web_search(query, max_sources)
+        if "error" in search_results:
+            return f"Research failed - search error: {search_results['error']}"
+
+        urls = [r.get('url') for r in search_results.get("results", [])[:max_sources] if r.get('url')]
+        if not urls:
+            return f"No search results found for: {query}"
+
+        # Cap extraction fan-out so target hosts aren't hammered
+        # and tail latency stays stable at higher max_sources
+        extract_sem = asyncio.Semaphore(min(6, max_sources))
+
+        async def extract_one(url):
+            async with extract_sem:
+                try:
+                    content = await websearch.extract_content(url)
+                except Exception as e:
+                    logger.error(f"Failed to extract {url}: {e}")
+                    return None
+            if "error" in content or not content.get('text'):
+                return None
+            return content
+
+        contents = await asyncio.gather(*[extract_one(url) for url in urls])
+
+        # Store all extracted pages in one batched pass so the
+        # embedder sees full batches across documents and Chroma
+        # gets one write instead of one per page
+        to_store = [
+            ContentResult(
+                url=url,
+                title=content.get('title', 'Untitled'),
+                text=content['text'],
+                timestamp=time.time()
+            )
+            for url, content in zip(urls, contents)
+            if content is not None and len(content['text']) > 500
+        ]
+        if to_store:
+            try:
+                await vectorizer.process_content_batch(to_store)
+            except Exception as e:
+                logger.error(f"Batch storage failed: {e}")
+
+        # Build the report in a StringIO buffer; += on a growing string
+        # re-copies it for every source
+        report = io.StringIO()
+        report.write(f"Research results for: {query}\n")
+        report.write("=" * 40 + "\n")
+        stored = 0
+        for url, content in zip(urls, contents):
+            if content is None:
+                continue
+            stored += 1
+            report.write(f"\n• {content.get('title', 'Untitled')}\n")
+            report.write(f"  {url}\n")
+            report.write(f"  {content.get('text', '')[:300]}...\n")
+        report.write(f"\nProcessed {stored}/{len(urls)} sources (stored in knowledge base).")
+        return report.getvalue()
+
+    async def _tool_smart_answer(self, arguments: Dict) -> str:
+        websearch = await self._get_websearch()
+        vectorizer = await self._get_vectorizer()
+
+        question = arguments["question"]
+
+        query_emb = await self._query_embedding(question)
+        if query_emb is not None:
+            cached = self._sem_get(query_emb)
+            if cached is not None:
+                return cached
+
+        # Fire the RAG lookup and the speculative web fallback together;
+        # a strong KB hit cancels the web search before it's awaited
+        rag_task = asyncio.create_task(vectorizer.rag_search(question, max_results=3))
+        web_task = asyncio.create_task(websearch.web_search(question, 2))
+
+        parts = []
+        rag_result = await rag_task
+        if rag_result.retrieved_chunks:
+            parts.append("From knowledge base:")
+            for chunk, source, score in zip(
+                rag_result.retrieved_chunks[:2],
+                rag_result.sources[:2],
+                rag_result.similarity_scores[:2]
+            ):
+                preview = f"{chunk[:300]}..." if len(chunk) > 300 else chunk
+                parts.append(f"- {source.get('title', 'Unknown')} ({score:.3f}): {preview}")
+
+            if rag_result.similarity_scores and rag_result.similarity_scores[0] > 0.75:
+                web_task.cancel()
+                parts.append("\nHigh relevance match found in knowledge base.")
+                answer = "\n".join(parts)
+                if query_emb is not None:
+                    self._sem_put(query_emb, answer)
+                return answer
+
+        parts.append("\nCurrent web information:")
+        try:
+            search_results = await web_task
+        except asyncio.CancelledError:
+            search_results = {"error": "cancelled", "results": []}
+        if "error" not in search_results and search_results.get("results"):
+            top = search_results["results"][0]
+            content = await websearch.extract_content(top.get("url", ""))
+            if "error" not in content:
+                text = content.get('text', '')
+                parts.append(f"{content.get('title', 'Current Information')}:")
+                parts.append(f"{text[:800]}...")
+                parts.append(f"Source: {top.get('url', '')}")
+        answer = "\n".join(parts)
+        if query_emb is not None:
+            self._sem_put(query_emb, answer)
+        return answer
+
+    def _trim_history(self):
+        """Bound prompt growth across a session
+
+        Stored tool outputs are clipped (the model already saw them in
+        full during the turn) and turns beyond the window are handed to
+        a background summarization task.
+        """
+        for message in self._history:
+            if message.get("role") == "tool" and len(message.get("content", "")) > 1500:
+                message["content"] = message["content"][:1500]
+        turn_starts = [
+            i for i, message in enumerate(self._history)
+            if message.get("role") == "user"
+        ]
+        if len(turn_starts) <= MAX_HISTORY_TURNS:
+            return
+        cut = turn_starts[len(turn_starts) - MAX_HISTORY_TURNS]
+        dropped, self._history = self._history[:cut], self._history[cut:]
+        self._spawn(self._summarize_dropped(dropped))
+
+    def _spawn(self, coro) -> asyncio.Task:
+        """create_task with a strong reference held until the task is done"""
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
+
+    async def _summarize_dropped(self, dropped: List[Dict]):
+        """Fold trimmed-off turns into a compact memory message"""
+        transcript = "\n".join(
+            f"{message.get('role')}: {message.get('content', '')[:500]}"
+            for message in dropped if message.get("content")
+        )
+        prior = self._memory_msg["content"] if self._memory_msg else ""
+        try:
+            response = await self._http.post(
+                "/api/chat",
+                content=orjson.dumps({
+                    "model": self.current_model,
+                    "messages": [{
+                        "role": "user",
+                        "content": (
+                            "Summarize this earlier conversation in at most "
+                            "five short bullet points, keeping facts and "
+                            f"decisions:\n\n{prior}\n{transcript}"
+                        )
+                    }],
+                    "stream": False,
+                    "keep_alive": "30m",
+                    "options": {"num_predict": 128}
+                }),
+                headers={"Content-Type": "application/json"}
+            )
+            if response.status_code != 200:
+                return
+            summary = orjson.loads(response.content).get(
+                "message", {}).get("content", "").strip()
+            if summary:
+                self._memory_msg = {
+                    "role": "system",
+                    "content": f"Summary of earlier conversation:\n{summary}"
+                }
+        except Exception as e:
+            logger.debug(f"History summarization failed: {e}")
+
+    async def _warmup_ollama(self):
+        """Load the model ahead of the first query; best-effort"""
+        try:
+            await self._http.post(
+                "/api/chat",
+                content=orjson.dumps({
+                    "model": self.current_model,
+                    "messages": [{"role": "user", "content": "hi"}],
+                    "stream": False,
+                    "keep_alive": "10m",
+                    "options": {"num_predict": 1}
+                }),
+                headers={"Content-Type": "application/json"}
+            )
+        except Exception as e:
+            logger.debug(f"Model warmup failed: {e}")
+
+    async def _stream_chat(self, payload: Dict, include_tools: bool = False) -> Dict[str, Any]:
+        """Stream one /api/chat call, echoing content tokens as they arrive
+
+        Returns the assembled assistant message. Tool-call turns carry no
+        content deltas, so nothing partial is printed before tools run.
+        """
+        content_parts: List[str] = []
+        tool_calls: List[Dict] = []
+        # Encode the body once with orjson; the static tool-schema blob is
+        # spliced in pre-serialized instead of being dict-walked every turn
+        # keep_alive pins the model in memory for the whole session so
+        # Ollama never unloads it between user messages
+        body = orjson.dumps(dict(payload, stream=True, keep_alive="30m"))
+        if include_tools:
+            body = body[:-1] + b',"tools":' + self._tools_blob + b'}'
+        async with self._http.stream(
+            "POST", "/api/chat", content=body,
+            headers={"Content-Type": "application/json"}
+        ) as response:
+            if response.status_code != 200:
+                await response.aread()
+                raise RuntimeError(f"Ollama error: {response.status_code}")
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                chunk = orjson.loads(line)
+                message = chunk.get("message", {})
+                if message.get("tool_calls"):
+                    tool_calls.extend(message["tool_calls"])
+                delta = message.get("content", "")
+                if delta:
+                    content_parts.append(delta)
+                    print(delta, end="", flush=True)
+                if chunk.get("done"):
+                    break
+        if content_parts:
+            print()
+        assistant_message: Dict[str, Any] = {
+            "role": "assistant",
+            "content": "".join(content_parts)
+        }
+        if tool_calls:
+            assistant_message["tool_calls"] = tool_calls
+        return assistant_message
+
+    async def chat_with_ollama(self, user_input: str) -> str:
+        """Chat with Ollama, executing any tool calls it requests
+
+        Responses are streamed to stdout as they decode; the assembled
+        text is also returned.
+        """
+        try:
+            prefix = [self._system_msg]
+            if self._memory_msg is not None:
+                prefix.append(self._memory_msg)
+            base = len(prefix)
+            messages = prefix + self._history + [
+                {"role": "user", "content": user_input}
+            ]
+
+            assistant_message = await self._stream_chat({
+                "model": self.current_model,
+                "messages": messages,
+                "options": {
+                    "temperature": self.config["llm"].get("temperature", 0.1)
+                }
+            }, include_tools=True)
+            tool_calls = assistant_message.get("tool_calls", [])
+
+            if not tool_calls:
+                self._history = messages[base:] + [assistant_message]
+                self._trim_history()
+                return assistant_message.get("content", "")
+
+            messages.append(assistant_message)
+
+            for tool_call in tool_calls:
+                print(f"\n[TOOL] Calling: {tool_call.get('function', {}).get('name', '')}")
+
+            # Independent tools hit different backends (Chroma, SearXNG,
+            # extractor), so run them concurrently and re-attach results
+            # in the original order to keep the message history consistent
+            tool_results = await asyncio.gather(
+                *[
+                    self.call_tool(
+                        tc.get("function", {}).get("name", ""),
+                        tc.get("function", {}).get("arguments", {})
+                    )
+                    for tc in tool_calls
+                ],
+                return_exceptions=True
+            )
+            tool_results = [
+                f"Tool execution failed: {r}" if isinstance(r, BaseException) else r
+                for r in tool_results
+            ]
+            for tool_call, tool_result in zip(tool_calls, tool_results):
+                messages.append({
+                    "role": "tool",
+                    "content": tool_result,
+                    "tool_call_id": tool_call.get("id", "")
+                })
+
+            # Self-contained tools already return a formatted answer;
+            # skip the second LLM decode entirely
+            if len(tool_calls) == 1:
+                only_tool = tool_calls[0].get("function", {}).get("name", "")
+                if only_tool in TOOLS_SELF_CONTAINED:
+                    print(tool_results[0])
+                    self._history = messages[base:] + [
+                        {"role": "assistant", "content": tool_results[0]}
+                    ]
+                    self._trim_history()
+                    return tool_results[0]
+
+                # A short tool result that already covers the question's
+                # key terms answers it verbatim; the summarize pass would
+                # only restate it at the cost of a full decode
+                tool_result = tool_results[0]
+                overlap_threshold = self.config["llm"].get("directAnswerOverlap", 0.5)
+                question_tokens = set(user_input.lower().split())
+                if question_tokens and len(tool_result) < 1500:
+                    tool_tokens = set(tool_result.lower().split())
+                    overlap = len(question_tokens & tool_tokens) / len(question_tokens)
+                    if overlap > overlap_threshold:
+                        print(tool_result)
+                        self._history = messages[base:] + [
+                            {"role": "assistant", "content": tool_result}
+                        ]
+                        self._trim_history()
+                        return tool_result
+
+            final_message = await self._stream_chat({
+                "model": self.current_model,
+                "messages": messages,
+                "options": {
+                    "temperature": self.config["llm"].get("temperature", 0.3),
+                    # The summary only needs to condense tool output;
+                    # cap decode length so long payloads can't run away
+                    "num_predict": 256
+                }
+            })
+            self._history = messages[base:] + [final_message]
+            self._trim_history()
+            return final_message.get("content", "")
+
+        except Exception as e:
+            error = f"Chat error: {e}"
+            print(error)
+            return error
+
+    def switch_model(self, model_name: str):
+        """Switch Ollama model"""
+        if model_name in self.available_models:
+            self.current_model = model_name
+            # Start loading the new model now instead of on the next query
+            self._spawn(self._warmup_ollama())
+            print(f"[OK] Switched to model: {model_name}")
+        else:
+            print(f"[ERROR] Model {model_name} not available. Available: {', '.join(self.available_models)}")
+
+    async def chat_loop(self):
+        """Interactive chat loop"""
+        # Load the model in the background while the services prewarm
+        # and the user reads the banner
+        self._spawn(self._warmup_ollama())
+
+        # Prewarm both services so the first real query doesn't pay
+        # Chroma open / embedding cold-start
+        await asyncio.gather(self._get_websearch(), self._get_vectorizer())
+
+        print(f"\n[MCP] In-Process Client Chat Interface")
+        print("=" * 45)
+        print(f"Current model: {self.current_model}")
+        print(f"Available tools: {', '.join(_TOOL_NAMES)}")
+        print("\nCommands:")
+        print("  /model <name> - Switch model")
+        print("  /exit - Exit chat")
+        print()
+
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                # Read in an executor thread so the event loop keeps
+                # serving background tasks while waiting on keystrokes
+                user_input = (await loop.run_in_executor(None, input, "You: ")).strip()
+
+                if user_input.lower() in ['/exit', '/quit']:
+                    break
+                elif user_input.startswith('/model '):
+                    self.switch_model(user_input[7:].strip())
+                    continue
+                elif not user_input:
+                    continue
+
+                print(f"\n[AI] {self.current_model}:")
+                await self.chat_with_ollama(user_input)
+                print("\n" + "=" * 60 + "\n")
+
+            except KeyboardInterrupt:
+                break
+            except Exception as e:
+                print(f"\n[ERROR] Error: {e}\n")
+
+    async def cleanup(self):
+        """Flush buffered vector writes, then release the pooled HTTP
+        client and the cache database"""
+        if self._vectorizer is not None:
+            # Chunks below the batch threshold only live in the write
+            # buffer; without this flush they vanish on exit after the
+            # store tool already reported success
+            await self._vectorizer.flush()
+            await self._vectorizer.aclose()
+        await self._http.aclose()
+        self._cache_db.close()
+
+
+async def main():
+    client = MCPClient()
+    client.initialize_tools()
+    try:
+        await client.chat_loop()
+    finally:
+        await client.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
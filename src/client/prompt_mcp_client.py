@@ -0,0 +1,485 @@
+"""
+Prompt-based MCP client for Ollama models without native tool calling
+Tool schemas ride in the system prompt and tool_calls JSON is parsed
+out of the model's /api/generate response
+"""
+
+import asyncio
+import re
+import time
+import httpx
+import orjson
+import logging
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
+
+from services.vectorstore import ContentVectorizer, ContentResult
+from services.websearch import WebSearchService
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("prompt-mcp-client")
+
+# Matches the tool_calls JSON object the model embeds in its response
+_TOOL_CALL_RE = re.compile(r'\{.*"tool_calls".*\}', re.DOTALL)
+
+# Result-line templates shared by every call instead of building a new
+# f-string per iteration
+_SEARCH_RESULT_TEMPLATE = (
+    "{i}. **{title}**\n"
+    "   URL: {url}\n"
+    "   Description: {desc}...\n"
+)
+_RAG_RESULT_TEMPLATE = (
+    "{i}. **{title}** (Similarity: {score:.3f})\n"
+    "   URL: {url}\n"
+    "   Content: {chunk}...\n"
+)
+
+# Parsed config keyed by path; re-read only when the file's mtime changes
+_CONFIG_CACHE: dict = {}
+
+
+def _load_config(config_file: str) -> dict:
+    """Load and parse the config file, memoized on modification time"""
+    mtime = os.path.getmtime(config_file)
+    cached = _CONFIG_CACHE.get(config_file)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    with open(config_file, 'rb') as f:
+        config = orjson.loads(f.read())
+    _CONFIG_CACHE[config_file] = (mtime, config)
+    return config
+
+
+class PromptMCPClient:
+    def __init__(self, config_file: str = "mcp_servers_config.json"):
+        self.config = _load_config(config_file)
+
+        self.ollama_url = self._get_ollama_url()
+        self.current_model = self.config["llm"]["model"]
+        self.available_models = self.config.get("availableModels", [])
+        self.tools = []
+
+        # One pooled client reused for the planning and final-answer
+        # POSTs of every turn; avoids per-turn handshakes against Ollama
+        self.http = httpx.AsyncClient(
+            base_url=self.ollama_url,
+            timeout=httpx.Timeout(120.0, connect=5.0),
+            limits=httpx.Limits(
+                max_keepalive_connections=8,
+                max_connections=16,
+                keepalive_expiry=60.0
+            )
+        )
+
+        # Heavy services are built once on first use and cached; the
+        # vectorizer in particular opens Chroma and warms the embedder
+        self._websearch = None
+        self._vectorizer = None
+
+        # Tool name -> handler coroutine; call_tool is one dict lookup
+        self._handlers = {
+            "describe_tool": self._handle_describe_tool,
+            "web_search": self._handle_web_search,
+            "extract_content": self._handle_extract_content,
+            "rag_search": self._handle_rag_search,
+            "store_content": self._handle_store_content,
+            "knowledge_stats": self._handle_knowledge_stats,
+        }
+
+    @property
+    def websearch(self) -> WebSearchService:
+        """Shared WebSearchService, created on first access"""
+        if self._websearch is None:
+            self._websearch = WebSearchService()
+        return self._websearch
+
+    @property
+    def vectorizer(self) -> ContentVectorizer:
+        """Shared ContentVectorizer, created on first access"""
+        if self._vectorizer is None:
+            self._vectorizer = ContentVectorizer(chroma_path="./data/chroma_db")
+        return self._vectorizer
+
+    def _get_ollama_url(self) -> str:
+        """Auto-detect environment and return appropriate Ollama URL"""
+        base_url = self.config["llm"]["baseUrl"]
+        if self._is_running_in_docker():
+            if "localhost" in base_url:
+                return base_url.replace("localhost", "host.docker.internal")
+            return base_url
+        if "host.docker.internal" in base_url:
+            return base_url.replace("host.docker.internal", "localhost")
+        return base_url
+
+    def _is_running_in_docker(self) -> bool:
+        """Detect if running inside a Docker container"""
+        try:
+            if os.path.exists('/.dockerenv'):
+                return True
+            if os.path.exists('/proc/self/cgroup'):
+                with open('/proc/self/cgroup', 'r') as f:
+                    return 'docker' in f.read().lower()
+            return bool(os.environ.get('DOCKER_CONTAINER'))
+        except Exception:
+            return False
+
+    def initialize_tools(self):
+        """Build the tool schemas advertised in the system prompt"""
+        self.tools = [
+            {
+                "type": "function",
+                "function": {
+                    "name": "web_search",
+                    "description": "Search the web for current information",
+                    "parameters": {
+                        "type": "object",
+                        "properties": {
+                            "query": {"type": "string", "description": "Search query"},
+                            "max_results": {"type": "integer", "description": "Max results (default 5)"}
+                        },
+                        "required": ["query"]
+                    }
+                }
+            },
+            {
+                "type": "function",
+                "function": {
+                    "name": "extract_content",
+                    "description": "Extract readable content from a web page",
+                    "parameters": {
+                        "type": "object",
+                        "properties": {
+                            "url": {"type": "string", "description": "URL to extract"}
+                        },
+                        "required": ["url"]
+                    }
+                }
+            },
+            {
+                "type": "function",
+                "function": {
+                    "name": "rag_search",
+                    "description": "Search the local knowledge base",
+                    "parameters": {
+                        "type": "object",
+                        "properties": {
+                            "query": {"type": "string", "description": "Search query"},
+                            "max_results": {"type": "integer", "description": "Max results (default 5)"}
+                        },
+                        "required": ["query"]
+                    }
+                }
+            },
+            {
+                "type": "function",
+                "function": {
+                    "name": "store_content",
+                    "description": "Store content in the knowledge base",
+                    "parameters": {
+                        "type": "object",
+                        "properties": {
+                            "url": {"type": "string", "description": "Source URL"},
+                            "title": {"type": "string", "description": "Content title"},
+                            "text": {"type": "string", "description": "Content text"}
+                        },
+                        "required": ["url", "title", "text"]
+                    }
+                }
+            },
+            {
+                "type": "function",
+                "function": {
+                    "name": "knowledge_stats",
+                    "description": "Get knowledge base statistics",
+                    "parameters": {"type": "object", "properties": {}}
+                }
+            }
+        ]
+        # Lazy discovery: only a compact name+description index rides in
+        # the prompt; full parameter schemas are served on demand through
+        # describe_tool, so every turn spends far fewer prompt tokens
+        self.tools_index = [
+            {
+                "name": tool["function"]["name"],
+                "description": tool["function"]["description"]
+            }
+            for tool in self.tools
+        ]
+        self._tool_schemas = {
+            tool["function"]["name"]: tool["function"] for tool in self.tools
+        }
+        # The index is static for the session; render the prompt once
+        self._tools_json = orjson.dumps(
+            self.tools_index, option=orjson.OPT_INDENT_2
+        ).decode()
+        self._system_prompt = (
+            "You are an AI assistant with access to these tools:\n\n"
+            f"{self._tools_json}\n\n"
+            "To use tools, respond ONLY with JSON of the form:\n"
+            '{"tool_calls": [{"tool": "<name>", "arguments": {...}}]}\n'
+            "Common arguments: query (search tools), url (extract_content). "
+            'Call describe_tool with {"name": "<tool>"} if you need a '
+            "tool's full parameter schema.\n"
+            "If no tool is needed, answer the question directly."
+        )
+
+    async def call_tool(self, tool_name: str, arguments: dict) -> str:
+        """Execute a tool call against the local services"""
+        handler = self._handlers.get(tool_name)
+        if handler is None:
+            return f"Unknown tool: {tool_name}"
+        try:
+            return await handler(arguments)
+        except Exception as e:
+            logger.error(f"Tool call failed: {e}")
+            return f"Tool execution failed: {e}"
+
+    async def _handle_describe_tool(self, arguments: dict) -> str:
+        schema = self._tool_schemas.get(arguments.get("name", ""))
+        if schema is None:
+            return f"Unknown tool: {arguments.get('name', '')}"
+        return orjson.dumps(schema, option=orjson.OPT_INDENT_2).decode()
+
+    async def _handle_web_search(self, arguments: dict) -> str:
+        query = arguments.get("query", "")
+        max_results = arguments.get("max_results", 5)
+        results = await self.websearch.web_search(query, max_results)
+        if "error" in results:
+            return f"Web search failed: {results['error']}"
+        formatted_results = [
+            _SEARCH_RESULT_TEMPLATE.format(
+                i=i,
+                title=result.get('title', 'No Title'),
+                url=result.get('url', ''),
+                desc=(result.get('content') or 'No description')[:200]
+            )
+            for i, result in enumerate(results.get("results", []), 1)
+        ]
+        return "\n".join(formatted_results) or "No results found."
+
+    async def _handle_extract_content(self, arguments: dict) -> str:
+        url = arguments.get("url", "")
+        content = await self.websearch.extract_content(url)
+        if "error" in content:
+            return f"Extraction failed: {content['error']}"
+        return (
+            f"Title: {content.get('title', 'No Title')}\n"
+            f"URL: {url}\n\n{content.get('text', '')}"
+        )
+
+    async def _handle_rag_search(self, arguments: dict) -> str:
+        query = arguments.get("query", "")
+        max_results = arguments.get("max_results", 5)
+        rag_result = await self.vectorizer.rag_search(query, max_results)
+        if not rag_result.retrieved_chunks:
+            return f"No relevant information in knowledge base for: {query}"
+        formatted_results = [
+            _RAG_RESULT_TEMPLATE.format(
+                i=i,
+                title=source.get('title', 'No Title'),
+                score=score,
+                url=source.get('url', ''),
+                chunk=chunk[:300]
+            )
+            for i, (chunk, source, score) in enumerate(zip(
+                rag_result.retrieved_chunks,
+                rag_result.sources,
+                rag_result.similarity_scores
+            ), 1)
+        ]
+        return "\n".join(formatted_results)
+
+    async def _handle_store_content(self, arguments: dict) -> str:
+        content_result = ContentResult(
+            url=arguments.get("url", ""),
+            title=arguments.get("title", ""),
+            text=arguments.get("text", ""),
+            timestamp=time.time()
+        )
+        result = await self.vectorizer.process_content(content_result)
+        return f"Storage result: {result.get('status')} ({result.get('chunks', 0)} chunks)"
+
+    async def _handle_knowledge_stats(self, arguments: dict) -> str:
+        stats = self.vectorizer.get_knowledge_stats()
+        return (
+            f"Knowledge base: {stats.get('total_chunks', 0)} chunks from "
+            f"{stats.get('unique_sources', 0)} sources "
+            f"(model: {stats.get('embedding_model', 'unknown')})"
+        )
+
+    async def _generate(self, prompt: str, temperature: float,
+                        echo: bool = False) -> str:
+        """Stream one /api/generate call, returning the assembled text
+
+        With echo=True tokens are printed as they decode, so the user
+        sees output at first-token latency instead of end of generation.
+        """
+        parts = []
+        async with self.http.stream(
+            "POST", "/api/generate",
+            json={
+                "model": self.current_model,
+                "prompt": prompt,
+                "stream": True,
+                "options": {"temperature": temperature}
+            }
+        ) as response:
+            if response.status_code != 200:
+                await response.aread()
+                raise RuntimeError(f"Ollama error: {response.status_code}")
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                chunk = orjson.loads(line)
+                token = chunk.get("response", "")
+                if token:
+                    parts.append(token)
+                    if echo:
+                        print(token, end="", flush=True)
+                if chunk.get("done"):
+                    break
+        if echo and parts:
+            print()
+        return "".join(parts)
+
+    async def chat_with_tools(self, user_input: str) -> str:
+        """One chat turn: plan tool calls via prompt, execute, answer"""
+        try:
+            tool_results = []
+            prompt = f"{self._system_prompt}\n\nUser: {user_input}\n\nAssistant:"
+
+            # Bounded plan/execute loop: a round that only looked up a
+            # schema via describe_tool gets another planning pass so the
+            # model can actually invoke the tool it just described,
+            # instead of dead-ending into the final answer
+            for _ in range(3):
+                # The planner output may be tool-call JSON, so accumulate
+                # it silently before deciding what to show
+                llm_response = await self._generate(
+                    prompt, self.config["llm"].get("temperature", 0.1)
+                )
+
+                json_match = _TOOL_CALL_RE.search(llm_response)
+                if not json_match:
+                    break
+                try:
+                    tool_request = orjson.loads(json_match.group())
+                except orjson.JSONDecodeError:
+                    break
+
+                tool_calls = tool_request.get("tool_calls", [])
+                if not tool_calls:
+                    break
+                for tool_call in tool_calls:
+                    print(f"\n[TOOL] Calling: {tool_call.get('tool', '')}")
+
+                # The requested tools are independent network-bound calls;
+                # run them concurrently and keep results in request order
+                results = await asyncio.gather(
+                    *[
+                        self.call_tool(tc.get("tool", ""), tc.get("arguments", {}))
+                        for tc in tool_calls
+                    ],
+                    return_exceptions=True
+                )
+                for tool_call, result in zip(tool_calls, results):
+                    if isinstance(result, BaseException):
+                        result = f"Tool execution failed: {result}"
+                    tool_results.append(
+                        f"Tool {tool_call.get('tool', '')} returned:\n{result}"
+                    )
+
+                if not any(tc.get("tool") == "describe_tool" for tc in tool_calls):
+                    break
+
+                # Feed the schema back and re-plan
+                prompt = (
+                    f"{self._system_prompt}\n\n"
+                    + "\n\n".join(tool_results)
+                    + f"\n\nUser: {user_input}\n\nAssistant:"
+                )
+
+            if not tool_results:
+                # No tools were called; the model answered directly
+                print(llm_response)
+                return llm_response
+
+            # The answer is for the user's eyes only; stream it out
+            return await self._generate(
+                f"Question: {user_input}\n\n"
+                + "\n\n".join(tool_results)
+                + "\n\nUsing the tool results above, answer the question:",
+                self.config["llm"].get("temperature", 0.3),
+                echo=True
+            )
+
+        except Exception as e:
+            error = f"Chat error: {e}"
+            print(error)
+            return error
+
+    def switch_model(self, model_name: str):
+        """Switch Ollama model"""
+        if model_name in self.available_models:
+            self.current_model = model_name
+            print(f"[OK] Switched to model: {model_name}")
+        else:
+            print(f"[ERROR] Model {model_name} not available. Available: {', '.join(self.available_models)}")
+
+    async def chat_loop(self):
+        """Interactive chat loop"""
+        print(f"\n[MCP] Prompt-Based Client Chat Interface")
+        print("=" * 45)
+        print(f"Current model: {self.current_model}")
+        print(f"Available tools: {', '.join(t['function']['name'] for t in self.tools)}")
+        print("\nCommands:")
+        print("  /model <name> - Switch model")
+        print("  /exit - Exit chat")
+        print()
+
+        while True:
+            try:
+                user_input = input("You: ").strip()
+
+                if user_input.lower() in ['/exit', '/quit']:
+                    break
+                elif user_input.startswith('/model '):
+                    self.switch_model(user_input[7:].strip())
+                    continue
+                elif not user_input:
+                    continue
+
+                print(f"\n[AI] {self.current_model}:")
+                await self.chat_with_tools(user_input)
+                print("\n" + "=" * 60 + "\n")
+
+            except KeyboardInterrupt:
+                break
+            except Exception as e:
+                print(f"\n[ERROR] Error: {e}\n")
+
+    async def cleanup(self):
+        """Flush buffered vector writes, then release the pooled HTTP client"""
+        if self._vectorizer is not None:
+            # Chunks below the batch threshold only live in the write
+            # buffer; without this flush they vanish on exit after the
+            # store tool already reported success
+            await self._vectorizer.flush()
+            await self._vectorizer.aclose()
+        await self.http.aclose()
+
+
+async def main():
+    client = PromptMCPClient()
+    client.initialize_tools()
+    try:
+        await client.chat_loop()
+    finally:
+        await client.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -4,6 +4,13 @@ Based on official FastMCP examples and documentation
 """
 
 import asyncio
+
+try:
+    import uvloop
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+except ImportError:
+    pass
+
 import httpx
 import time
 import hashlib
@@ -4,8 +4,14 @@ This server exposes tools that LLMs can call autonomously via MCP
 """
 
 import asyncio
-import json
+import orjson
 import logging
+
+try:
+    import uvloop
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+except ImportError:
+    pass
 from typing import Any, Dict, List, Optional
 import httpx
 import sys
@@ -13,7 +19,8 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
 from services.vectorstore import ContentVectorizer, ContentResult, RAGResult
 import time
-import hashlib
+from xxhash import xxh3_64_hexdigest
+import zstandard as zstd
 import redis.asyncio as redis
 
 # MCP imports
@@ -38,19 +45,50 @@ vectorizer = ContentVectorizer(chroma_path="./data/chroma_db")
 # Redis cache for search coordination
 redis_client = None
 
+# Cached payload compression, shared across tool calls
+_zstd_compress = zstd.ZstdCompressor(level=3)
+_zstd_decompress = zstd.ZstdDecompressor()
+
 async def get_redis():
     global redis_client
     if not redis_client:
         redis_url = os.getenv("REDIS_URL", "redis://redis:6379")
-        redis_client = await redis.from_url(redis_url, decode_responses=True)
+        # Binary-safe client; cached payloads are zstd-compressed bytes
+        redis_client = await redis.from_url(redis_url, decode_responses=False)
     return redis_client
 
+def get_cache_key(prefix: str, ident: str) -> str:
+    """Build a cache key with a fast non-cryptographic hash"""
+    return f"{prefix}:{xxh3_64_hexdigest(ident)}"
+
+async def get_cached_contents(urls: List[str]) -> Dict[str, Dict]:
+    """Resolve cached extractions for many URLs in one MGET round-trip"""
+    try:
+        cache = await get_redis()
+        keys = [get_cache_key("content", url) for url in urls]
+        hits = await cache.mget(keys)
+        return {url: orjson.loads(_zstd_decompress.decompress(raw)) for url, raw in zip(urls, hits) if raw}
+    except Exception as e:
+        logger.warning(f"Failed to get cached contents: {e}")
+        return {}
+
+async def cache_contents(contents: Dict[str, Dict], ttl: int = 1800):
+    """Write extracted contents for many URLs in one pipelined round-trip"""
+    try:
+        cache = await get_redis()
+        async with cache.pipeline(transaction=False) as pipe:
+            for url, content in contents.items():
+                pipe.setex(get_cache_key("content", url), ttl, _zstd_compress.compress(orjson.dumps(content)))
+            await pipe.execute()
+    except Exception as e:
+        logger.warning(f"Failed to cache contents: {e}")
+
 async def cache_search_result(query: str, result: Dict, ttl: int = 3600):
     """Cache search results with TTL"""
     try:
         cache = await get_redis()
-        cache_key = f"search:{hashlib.md5(query.encode()).hexdigest()}"
-        await cache.setex(cache_key, ttl, json.dumps(result))
+        cache_key = get_cache_key("search", query)
+        await cache.setex(cache_key, ttl, _zstd_compress.compress(orjson.dumps(result)))
         logger.debug(f"Cached search result for: {query}")
     except Exception as e:
         logger.warning(f"Failed to cache search result: {e}")
@@ -59,11 +97,11 @@ async def get_cached_search(query: str) -> Dict:
     """Get cached search results"""
     try:
         cache = await get_redis()
-        cache_key = f"search:{hashlib.md5(query.encode()).hexdigest()}"
+        cache_key = get_cache_key("search", query)
         cached = await cache.get(cache_key)
         if cached:
             logger.debug(f"Found cached search result for: {query}")
-            return json.loads(cached)
+            return orjson.loads(_zstd_decompress.decompress(cached))
         return None
     except Exception as e:
         logger.warning(f"Failed to get cached search: {e}")
@@ -237,10 +275,12 @@ async def call_tool(name: str, arguments: Dict[str, Any]) -> List[types.TextCont
             # Format results for LLM
             formatted_results = []
             for i, result in enumerate(results.get("results", []), 1):
+                content = result.get("content") or "No description"
+                preview = f"{content[:200]}..." if len(content) > 200 else content
                 formatted_results.append(
                     f"{i}. **{result.get('title', 'No Title')}**\n"
                     f"   URL: {result.get('url', '')}\n"
-                    f"   Description: {result.get('content', 'No description')[:200]}...\n"
+                    f"   Description: {preview}\n"
                 )
             
             response = f"Found {results.get('number_of_results', 0)} search results:\n\n" + "\n".join(formatted_results)
@@ -297,10 +337,11 @@ async def call_tool(name: str, arguments: Dict[str, Any]) -> List[types.TextCont
                 rag_result.sources,
                 rag_result.similarity_scores
             ), 1):
+                preview = f"{chunk[:300]}..." if len(chunk) > 300 else chunk
                 formatted_results.append(
                     f"{i}. **{source.get('title', 'No Title')}** (Similarity: {score:.3f})\n"
                     f"   URL: {source.get('url', '')}\n"
-                    f"   Content: {chunk[:300]}...\n"
+                    f"   Content: {preview}\n"
                 )
             
             response = f"Found {len(rag_result.retrieved_chunks)} relevant chunks:\n\n" + "\n".join(formatted_results)
@@ -390,12 +431,19 @@ async def call_tool(name: str, arguments: Dict[str, Any]) -> List[types.TextCont
                     )]
                 
                 # Step 2: Parallel content extraction
-                content_tasks = []
                 import asyncio
-                
+
+                # Resolve already-extracted URLs in a single MGET before fetching
+                cached_contents = await get_cached_contents(urls)
+                fresh_contents = {}
+
                 async def extract_and_process(url):
                     try:
-                        content = await websearch_service.extract_content(url)
+                        content = cached_contents.get(url)
+                        if content is None:
+                            content = await websearch_service.extract_content(url)
+                            if "error" not in content:
+                                fresh_contents[url] = content
                         if "error" not in content:
                             content_length = len(content.get('text', ''))
                             
@@ -418,7 +466,11 @@ async def call_tool(name: str, arguments: Dict[str, Any]) -> List[types.TextCont
                 
                 # Execute extractions in parallel
                 extraction_results = await asyncio.gather(*[extract_and_process(url) for url in urls])
-                
+
+                # Pipeline the cache writes for fresh extractions in one round-trip
+                if fresh_contents:
+                    await cache_contents(fresh_contents)
+
                 # Step 3: Compile results
                 extracted_contents = []
                 stored_count = 0
@@ -575,12 +627,18 @@ async def main():
     logger.info("Starting WebSearch MCP Server")
     
     # Use stdio transport for MCP
-    async with stdio_server() as (read_stream, write_stream):
-        await server.run(
-            read_stream,
-            write_stream,
-            server.create_initialization_options()
-        )
+    try:
+        async with stdio_server() as (read_stream, write_stream):
+            await server.run(
+                read_stream,
+                write_stream,
+                server.create_initialization_options()
+            )
+    finally:
+        # Flush vector chunks still sitting in the write buffer so a
+        # store that reported success is actually durable after exit
+        await vectorizer.flush()
+        await vectorizer.aclose()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
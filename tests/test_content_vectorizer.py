@@ -0,0 +1,56 @@
+"""Tests for content-defined chunking in ContentVectorizer"""
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from services.vectorstore.content_vectorizer import ContentVectorizer
+
+
+def _chunker() -> ContentVectorizer:
+    # _cdc_chunk is pure string work; skip __init__ so the test needs
+    # no ChromaDB store or Ollama endpoint
+    return ContentVectorizer.__new__(ContentVectorizer)
+
+
+def _synthetic_prose(n_sentences: int) -> str:
+    # Sentence endings must vary: the boundary fingerprint hashes the
+    # trailing bytes, so identical tails would collapse every decision
+    return ' '.join(
+        f"Sentence number {i} discusses topic {i * 37 % 101} and closes "
+        f"with marker {i * i + 7}."
+        for i in range(n_sentences)
+    )
+
+
+def test_cdc_boundaries_survive_prefix_edit():
+    """A prefix edit must not shift every downstream chunk boundary.
+
+    Hash-derived cuts resynchronize shortly after the edit point, so the
+    bulk of the chunks from the edited document should be byte-identical
+    to chunks of the original — that is the property dedupe relies on.
+    """
+    vectorizer = _chunker()
+    original = _synthetic_prose(200)
+    edited = "A brand new opening paragraph was inserted here. " + original
+
+    original_chunks = vectorizer._cdc_chunk(original)
+    edited_chunks = vectorizer._cdc_chunk(edited)
+
+    assert len(original_chunks) > 5
+    shared = set(original_chunks) & set(edited_chunks)
+    assert len(shared) >= len(original_chunks) * 0.5
+
+
+def test_cdc_hash_cuts_dominate_max_size_cap():
+    """Most boundaries should come from the rolling hash, not the cap.
+
+    If nearly every chunk sits at max_size, boundaries are effectively
+    fixed-position and content-defined chunking buys nothing.
+    """
+    vectorizer = _chunker()
+    chunks = vectorizer._cdc_chunk(_synthetic_prose(300), avg=512, max_size=1024)
+
+    capped = sum(1 for chunk in chunks if len(chunk) >= 1024 - 128)
+    assert capped < len(chunks) * 0.5